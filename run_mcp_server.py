@@ -21,12 +21,12 @@ async def main():
         logger.info("传输协议: stdio")
         
         # 导入MCP服务器
-        from main import mcp
+        from main import mcp, serve_stdio
         
         logger.info(f"✅ MCP服务器导入成功: {mcp.name}")
         
-        # 启动MCP服务器
-        await mcp.run_stdio_async()
+        # 启动MCP服务器（握手期间后台预热连接和WBI密钥）
+        await serve_stdio()
         
     except KeyboardInterrupt:
         logger.info("收到中断信号，正在关闭服务器...")
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+测试AIMD自适应限速
+验证成功时加性提速、412/-799/HTML验证页时乘性降速、按cookie身份隔离，以及速率收敛到账号可承受的上限附近
+"""
+
+import asyncio
+import json
+import sys
+import os
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+import main
+from main import AsyncBilibiliAPI, RateLimiter, ResponseCache, cookie_identity, AIMD_MAX_FACTOR, AIMD_MIN_FACTOR
+
+VIEW_URL = "https://api.bilibili.com/x/web-interface/view"
+
+
+def test_aimd_steps():
+    """测试加性提速、乘性降速和上下限"""
+    print("📈 测试AIMD调整")
+    print("=" * 50)
+    
+    limiter = RateLimiter({"view": (1.0, 4)}, jitter=0)
+    for _ in range(10):
+        limiter.record(VIEW_URL, throttled=False)
+    bucket = limiter.bucket("view")
+    assert abs(bucket.rate - 1.5) < 1e-9, f"10次成功后应提速到1.5，实际{bucket.rate}"
+    
+    limiter.record(VIEW_URL, throttled=True)
+    assert abs(bucket.rate - 0.75) < 1e-9 and bucket.available() < 0.01, "限流后速率减半并清空突发令牌"
+    
+    for _ in range(200):
+        limiter.record(VIEW_URL, throttled=False)
+    assert bucket.rate == AIMD_MAX_FACTOR, "速率不应超过上限"
+    for _ in range(20):
+        limiter.record(VIEW_URL, throttled=True)
+    assert bucket.rate == AIMD_MIN_FACTOR, "速率不应低于下限"
+    
+    fixed = RateLimiter({"view": (1.0, 4)}, jitter=0, adaptive=False)
+    fixed.record(VIEW_URL, throttled=True)
+    assert fixed.bucket("view").rate == 1.0, "关闭自适应时速率不变"
+    print("✅ AIMD调整和上下限正确")
+
+
+def test_identities_are_independent():
+    """测试不同cookie身份的速率互不影响"""
+    print("\n👥 测试身份隔离")
+    print("=" * 50)
+    
+    assert cookie_identity(None) == "anonymous"
+    assert cookie_identity({"DedeUserID": "42", "SESSDATA": "x"}) == "uid:42"
+    assert cookie_identity({"SESSDATA": "secret"}).startswith("sess:")
+    
+    limiter = RateLimiter({"search": (1.0, 1)}, jitter=0)
+    url = "https://api.bilibili.com/x/web-interface/search/type"
+    limiter.record(url, throttled=True, identity="uid:1")
+    assert limiter.bucket("search", "uid:1").rate == 0.5
+    assert limiter.bucket("search", "uid:2").rate == 1.0, "其他账号不应被降速"
+    assert limiter.reserve(url, "uid:2") == 0, "其他账号的令牌桶独立"
+    print("✅ 各身份的令牌桶和速率独立")
+
+
+def test_feedback_from_responses():
+    """测试请求结果反馈到限速器"""
+    print("\n🔁 测试响应反馈")
+    print("=" * 50)
+    
+    responses = iter([
+        httpx.Response(200, json={"code": 0, "data": {"bvid": "BV1"}}),
+        httpx.Response(200, json={"code": -799, "message": "请求过于频繁，请稍后再试"}),
+        httpx.Response(200, headers={"content-type": "text/html"}, content=b"<html><script>challenge</script></html>"),
+        httpx.Response(200, json={"code": -404, "message": "啥都木有"}),
+    ])
+    
+    async def handler(request):
+        return next(responses)
+    
+    limiter = RateLimiter({"view": (100.0, 100)}, jitter=0)
+    api = AsyncBilibiliAPI(cookies={"DedeUserID": "7"}, rate_limiter=limiter, cache=ResponseCache(),
+                           transport=httpx.MockTransport(handler))
+    bucket = limiter.bucket("view", "uid:7")
+    
+    async def run():
+        try:
+            rates = []
+            for i in range(4):
+                await api._make_request(VIEW_URL, params={"bvid": f"BV{i}"})
+                rates.append(round(bucket.rate, 3))
+            return rates
+        finally:
+            await api.aclose()
+    
+    rates = asyncio.run(run())
+    print(f"   速率变化: {rates}")
+    assert rates == [105.0, 52.5, 26.25, 31.25], "成功提速，-799和HTML验证页降速，业务错误视为正常响应"
+    assert bucket.successes == 2 and bucket.throttles == 2
+    print("✅ 412/-799/HTML验证页触发降速")
+
+
+def test_converges_to_tolerated_rate():
+    """模拟账号最多承受3次/秒的服务端，验证速率收敛到上限附近"""
+    print("\n🎯 测试速率收敛")
+    print("=" * 50)
+    
+    tolerated = 3.0
+    limiter = RateLimiter({"view": (1.0, 1)}, jitter=0)
+    bucket = limiter.bucket("view")
+    
+    rates = []
+    for _ in range(2000):
+        limiter.record(VIEW_URL, throttled=bucket.rate > tolerated)
+        rates.append(bucket.rate)
+    
+    steady = rates[500:]
+    average = sum(steady) / len(steady)
+    print(f"   固定速率: 1.00次/秒, 自适应稳态平均: {average:.2f}次/秒, 区间[{min(steady):.2f}, {max(steady):.2f}]")
+    assert tolerated / 2 <= min(steady) and max(steady) <= tolerated + 0.05 + 1e-9
+    assert average > 2.0, "稳态吞吐应明显高于保守的固定速率"
+    print("✅ 速率在可承受上限附近锯齿收敛")
+
+
+def test_status_tool():
+    """测试限速状态工具"""
+    print("\n📋 测试限速状态工具")
+    print("=" * 50)
+    
+    main.rate_limiter.record(VIEW_URL, throttled=False, identity="uid:status")
+    output = json.loads(main.get_rate_limit_status(output_format="compact"))
+    rows = [row for row in output["data"]["list"] if row["identity"] == "uid:status"]
+    assert rows and rows[0]["family"] == "view" and rows[0]["successes"] == 1
+    assert rows[0]["rate_per_second"] > rows[0]["base_rate"]
+    assert "\nfamily\tidentity\t" in main.get_rate_limit_status(output_format="table")
+    print("✅ 状态工具展示各身份的当前速率")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试自适应限速...")
+    
+    test_aimd_steps()
+    test_identities_are_independent()
+    test_feedback_from_responses()
+    test_converges_to_tolerated_rate()
+    test_status_tool()
+    
+    print("\n" + "=" * 60)
+    print("🎉 自适应限速测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
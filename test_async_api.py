@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+测试异步BilibiliAPI客户端和异步MCP工具
+使用httpx.MockTransport模拟B站接口，验证并发调用会重叠网络等待
+"""
+
+import asyncio
+import json
+import sys
+import os
+import time
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+from main import AsyncBilibiliAPI, RateLimiter
+
+# 模拟接口的网络延迟（秒）
+MOCK_LATENCY = 0.3
+
+
+async def mock_handler(request: httpx.Request) -> httpx.Response:
+    """模拟B站视频信息接口"""
+    await asyncio.sleep(MOCK_LATENCY)
+    bvid = request.url.params.get("bvid", "")
+    return httpx.Response(200, json={
+        "code": 0,
+        "message": "0",
+        "data": {"bvid": bvid, "aid": 170001, "title": f"测试视频 {bvid}", "stat": {"view": 100}}
+    })
+
+
+def make_api(view_rate: float = 0.0) -> AsyncBilibiliAPI:
+    """创建测试实例（view_rate为0表示不限速）"""
+    limiter = RateLimiter({"view": (view_rate, 1)}, jitter=0)
+    return AsyncBilibiliAPI(cookies={}, rate_limiter=limiter, transport=httpx.MockTransport(mock_handler))
+
+
+def test_concurrent_requests_overlap():
+    """测试并发请求重叠网络等待"""
+    print("⚡ 测试并发请求")
+    print("=" * 50)
+    
+    async def run():
+        api = make_api()
+        bvids = [f"BV1test{i:05d}" for i in range(5)]
+        start = time.perf_counter()
+        results = await asyncio.gather(*(api.get_video_info(bvid) for bvid in bvids))
+        elapsed = time.perf_counter() - start
+        await api.aclose()
+        return bvids, results, elapsed
+    
+    bvids, results, elapsed = asyncio.run(run())
+    print(f"📊 5个并发请求耗时: {elapsed:.2f}秒 (单次延迟{MOCK_LATENCY}秒)")
+    
+    assert [r["data"]["bvid"] for r in results] == bvids
+    assert elapsed < MOCK_LATENCY * 3, "并发请求没有重叠等待"
+    print("✅ 并发请求的网络等待已重叠")
+
+
+def test_async_pacing_does_not_block_loop():
+    """测试请求间隔使用asyncio.sleep，不阻塞事件循环"""
+    print("\n⏱️ 测试异步请求间隔")
+    print("=" * 50)
+    
+    async def run():
+        api = make_api(view_rate=5.0)  # 每0.2秒一个令牌
+        ticks = 0
+        
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.05)
+                ticks += 1
+        
+        task = asyncio.create_task(ticker())
+        await api.get_video_info("BV1pace00001")
+        await api.get_video_info("BV1pace00002")
+        task.cancel()
+        await api.aclose()
+        return ticks
+    
+    ticks = asyncio.run(run())
+    print(f"📊 请求期间其他协程运行了 {ticks} 次")
+    assert ticks > 5, "请求间隔阻塞了事件循环"
+    print("✅ 请求间隔期间事件循环保持响应")
+
+
+def test_async_tool():
+    """测试异步MCP工具"""
+    print("\n🛠️ 测试异步MCP工具")
+    print("=" * 50)
+    
+    import main
+    
+    original_api = main.bili_api_async
+    main.bili_api_async = make_api()
+    try:
+        result = asyncio.run(main.get_video_info_async("BV1tool00001"))
+        data = json.loads(result)
+        print(f"📺 工具返回标题: {data['data']['basic_info']['title']}")
+        assert data["data"]["basic_info"]["bvid"] == "BV1tool00001"
+        print("✅ 异步工具返回正常")
+    finally:
+        main.bili_api_async = original_api
+
+
+def main():
+    """主测试函数"""
+    print("🚀 开始测试异步API客户端...")
+    
+    test_concurrent_requests_overlap()
+    test_async_pacing_does_not_block_loop()
+    test_async_tool()
+    
+    print("\n" + "=" * 60)
+    print("🎉 异步API测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
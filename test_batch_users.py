@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+测试批量用户资料查询
+使用httpx.MockTransport模拟名片、空间信息和关系统计接口，验证合并资料、回退逻辑和并发执行
+"""
+
+import asyncio
+import json
+import sys
+import os
+import time
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+import main
+from main import AsyncBilibiliAPI, RateLimiter, WbiSigner
+
+# 模拟接口的网络延迟（秒）
+MOCK_LATENCY = 0.1
+
+
+class MockUserServer:
+    """模拟用户相关接口；mid以9开头的用户名片接口返回风控错误，以8开头的名片mid不是数字"""
+    
+    def __init__(self):
+        self.paths = []
+    
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        self.paths.append(path)
+        await asyncio.sleep(MOCK_LATENCY)
+        
+        if path.endswith("/card"):
+            mid = request.url.params["mid"]
+            if mid.startswith("9"):
+                return httpx.Response(200, json={"code": -352, "message": "风控校验失败"})
+            return httpx.Response(200, json={"code": 0, "data": {
+                "card": {"mid": "未知" if mid.startswith("8") else mid, "name": f"UP主{mid}", "sign": "签名" * 80, "attention": 12, "fans": 3400,
+                         "level_info": {"current_level": 6}, "Official": {"title": "知名UP主"}, "vip": {"status": 1}},
+                "follower": 3456, "archive_count": 78, "like_num": 9000,
+            }})
+        if path.endswith("/acc/info"):
+            mid = request.url.params["mid"]
+            return httpx.Response(200, json={"code": 0, "data": {"mid": int(mid), "name": f"空间{mid}", "level": 5}})
+        if path.endswith("/relation/stat"):
+            return httpx.Response(200, json={"code": 0, "data": {"following": 7, "follower": 88}})
+        return httpx.Response(404)
+
+
+def make_api(server: MockUserServer) -> AsyncBilibiliAPI:
+    """创建不限速的测试实例（预置WBI密钥，避免请求导航接口）"""
+    limiter = RateLimiter({family: (0.0, 1) for family in ("card", "space", "relation")}, jitter=0)
+    signer = WbiSigner()
+    signer.set_keys("7cd084941338484aae1ad9425b84077c", "4932caff0ff746eab6f01bf08b70ac45")
+    return AsyncBilibiliAPI(cookies={}, rate_limiter=limiter, wbi_signer=signer,
+                            transport=httpx.MockTransport(server.handler))
+
+
+def test_card_profiles_concurrent():
+    """测试名片接口一次返回资料和粉丝数，多个用户并发请求"""
+    print("👥 测试批量用户资料")
+    print("=" * 50)
+    
+    server = MockUserServer()
+    
+    async def run():
+        api = make_api(server)
+        start = time.perf_counter()
+        result = await api.get_users([str(100 + i) for i in range(10)] + ["100"])
+        elapsed = time.perf_counter() - start
+        await api.aclose()
+        return result, elapsed
+    
+    result, elapsed = asyncio.run(run())
+    users = result["data"]["users"]
+    print(f"📊 10个用户耗时: {elapsed:.2f}秒, 请求数: {len(server.paths)}")
+    
+    assert len(users) == 10
+    assert users[0]["data"]["follower"] == 3456 and users[0]["data"]["following"] == 12
+    assert users[0]["data"]["source"] == "card"
+    assert len(server.paths) == 10, "每个用户只应请求一次名片接口"
+    assert elapsed < MOCK_LATENCY * 10 / 2, "批量请求没有并发执行"
+    print("✅ 每个用户一次请求拿到资料和粉丝数")
+
+
+def test_fallback_to_space_and_relation():
+    """测试名片接口失败时回退到空间信息和关系统计接口"""
+    print("\n🛟 测试回退逻辑")
+    print("=" * 50)
+    
+    server = MockUserServer()
+    
+    async def run():
+        api = make_api(server)
+        result = await api.get_users(["900", "abc", "800"])
+        without_relation = await api.get_user_profile("901", include_relation=False)
+        await api.aclose()
+        return result, without_relation
+    
+    result, without_relation = asyncio.run(run())
+    users = result["data"]["users"]
+    print(f"📊 回退结果: {users[0]}")
+    
+    assert users[0]["data"]["source"] == "space"
+    assert users[0]["data"]["name"] == "空间900" and users[0]["data"]["follower"] == 88
+    assert "error" in users[1]
+    assert users[2]["data"]["source"] == "space" and users[2]["data"]["name"] == "空间800", "名片mid异常时回退，不影响整批结果"
+    assert "follower" not in without_relation["data"]
+    print("✅ 名片接口失败时使用空间信息和关系统计组装资料")
+
+
+def test_tool_output():
+    """测试批量用户工具的紧凑输出和缓存命中"""
+    print("\n🛠️ 测试批量用户工具")
+    print("=" * 50)
+    
+    server = MockUserServer()
+    original = main.bili_api_async
+    main.bili_api_async = make_api(server)
+    try:
+        main.get_users(["321"])
+        output = main.get_users("321, 322")
+    finally:
+        main.bili_api_async = original
+    
+    result = json.loads(output)
+    print(f"📊 统计: {result['stats']}")
+    
+    assert "\n" not in output
+    assert result["stats"]["cached"] == 1
+    assert len(result["data"]["users"][0]["data"]["sign"]) <= 103
+    
+    class NullFieldsAPI:
+        """返回data或sign为null的用户"""
+        _dedupe_ids = staticmethod(main.bili_api_async._dedupe_ids)
+        
+        async def get_users(self, uids, include_relation):
+            users = [{"uid": "1", "data": None}, {"uid": "2", "data": {"name": "无签名", "sign": None}},
+                     {"uid": "3", "data": {"name": "正常", "sign": "签名" * 80}}]
+            return {"code": 0, "data": {"users": users}, "stats": {}}
+        
+        async def aclose(self):
+            pass
+    
+    main.bili_api_async = NullFieldsAPI()
+    try:
+        users = json.loads(main.get_users("1,2,3"))["data"]["users"]
+    finally:
+        main.bili_api_async = original
+    assert users[0]["data"] is None and users[1]["data"]["sign"] is None
+    assert len(users[2]["data"]["sign"]) == 103, "个别用户字段为null不影响整批输出"
+    print("✅ 第二次调用命中缓存，输出紧凑")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试批量用户资料查询...")
+    
+    test_card_profiles_concurrent()
+    test_fallback_to_space_and_relation()
+    test_tool_output()
+    
+    print("\n" + "=" * 60)
+    print("🎉 批量用户资料查询测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+测试批量视频信息查询
+使用httpx.MockTransport模拟视频详情接口，验证去重、缓存命中、并发上限和单个ID的错误处理
+"""
+
+import asyncio
+import json
+import sys
+import os
+import time
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+import main
+from main import AsyncBilibiliAPI, RateLimiter, ResponseCache
+
+# 模拟接口的网络延迟（秒）
+MOCK_LATENCY = 0.1
+
+
+class MockVideoServer:
+    """模拟视频详情接口，记录请求次数和最大并发数"""
+    
+    def __init__(self):
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+    
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        bvid = request.url.params.get("bvid", "")
+        self.requests.append(bvid)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(MOCK_LATENCY)
+        finally:
+            self.active -= 1
+        if bvid.endswith("missing"):
+            return httpx.Response(200, json={"code": -404, "message": "啥都木有"})
+        return httpx.Response(200, json={
+            "code": 0,
+            "message": "0",
+            "data": {"bvid": bvid, "aid": 1, "title": f"视频 {bvid}", "duration": 125,
+                     "owner": {"name": "UP主", "mid": 2}, "stat": {"view": 100, "like": 10}}
+        })
+
+
+def make_api(server: MockVideoServer, cache: ResponseCache = None) -> AsyncBilibiliAPI:
+    """创建不限速的测试实例"""
+    limiter = RateLimiter({"view": (0.0, 1)}, jitter=0)
+    return AsyncBilibiliAPI(cookies={}, rate_limiter=limiter, cache=cache,
+                            transport=httpx.MockTransport(server.handler))
+
+
+def test_dedupe_cache_and_errors():
+    """测试重复ID只请求一次、缓存命中不发请求、失败ID单独记录错误"""
+    print("📦 测试批量查询")
+    print("=" * 50)
+    
+    server = MockVideoServer()
+    
+    async def run():
+        api = make_api(server)
+        await api.get_video_info("BV1cached0001")
+        server.requests.clear()
+        
+        bvids = ["BV1cached0001", "BV1video00001", "BV1video00002", "BV1video00001", "BV1missing"]
+        result = await api.get_videos_info(bvids)
+        await api.aclose()
+        return result
+    
+    result = asyncio.run(run())
+    videos = result["data"]["videos"]
+    print(f"📊 统计: {result['stats']}, 实际请求: {server.requests}")
+    
+    assert [v["bvid"] for v in videos] == ["BV1cached0001", "BV1video00001", "BV1video00002", "BV1missing"]
+    assert sorted(server.requests) == ["BV1missing", "BV1video00001", "BV1video00002"]
+    assert result["stats"]["cached"] == 1 and result["stats"]["failed"] == 1
+    assert videos[3]["error"] == "啥都木有"
+    assert videos[1]["data"]["title"] == "视频 BV1video00001"
+    print("✅ 去重、缓存命中和单个错误处理正确")
+
+
+def test_bounded_concurrency():
+    """测试并发请求数不超过上限，且比串行快"""
+    print("\n⚡ 测试并发上限")
+    print("=" * 50)
+    
+    server = MockVideoServer()
+    
+    async def run():
+        api = make_api(server)
+        start = time.perf_counter()
+        result = await api.get_videos_info([f"BV1batch{i:05d}" for i in range(20)], max_concurrency=5)
+        elapsed = time.perf_counter() - start
+        await api.aclose()
+        return result, elapsed
+    
+    result, elapsed = asyncio.run(run())
+    print(f"📊 20个视频耗时: {elapsed:.2f}秒, 最大并发: {server.max_active}")
+    
+    assert result["stats"]["fetched"] == 20 and result["stats"]["failed"] == 0
+    assert server.max_active <= 5
+    assert elapsed < MOCK_LATENCY * 20 / 2, "批量请求没有并发执行"
+    print("✅ 并发数受限且总耗时明显小于串行")
+
+
+def test_tool_output():
+    """测试批量工具的紧凑输出（无效BV号不发请求）"""
+    print("\n🛠️ 测试批量工具输出")
+    print("=" * 50)
+    
+    server = MockVideoServer()
+    original = main.bili_api_async
+    main.bili_api_async = make_api(server)
+    try:
+        output = main.get_videos_info(["BV1tool000001", "av123", "BV1tool000001"])
+    finally:
+        main.bili_api_async = original
+    
+    result = json.loads(output)
+    videos = result["data"]["videos"]
+    print(f"📏 输出长度: {len(output)}字符")
+    
+    assert "\n" not in output, "批量结果应为紧凑JSON"
+    assert videos[0]["data"]["duration"] == "2:05"
+    assert "error" in videos[1]
+    assert server.requests == ["BV1tool000001"]
+    print("✅ 工具输出紧凑，无效ID单独报错")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试批量视频信息查询...")
+    
+    test_dedupe_cache_and_errors()
+    test_bounded_concurrency()
+    test_tool_output()
+    
+    print("\n" + "=" * 60)
+    print("🎉 批量视频信息查询测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+测试工具调用的截止时间
+验证截止时间的嵌套和跨线程传递、重试循环在剩余时间不足时放弃等待，以及工具按时返回部分结果或超时结果
+"""
+
+import asyncio
+import json
+import sys
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+import main
+from main import AsyncBilibiliAPI, BilibiliAPI, ProxyPool, RateLimiter, ResponseCache, call_deadline, remaining_budget, within_deadline, carry_deadline
+
+
+def make_api(handler, profiles=None) -> AsyncBilibiliAPI:
+    limiter = RateLimiter(profiles or {"default": (0.0, 1), "reply": (0.0, 1), "view": (0.0, 1)}, jitter=0, adaptive=False)
+    return AsyncBilibiliAPI(cookies={}, rate_limiter=limiter, cache=ResponseCache(), transport=httpx.MockTransport(handler))
+
+
+def run_tool(api: AsyncBilibiliAPI, timeout: float, call):
+    """临时替换异步API实例和调用时限后执行同步工具，返回(结果, 耗时)"""
+    original_api, original_timeout = main.bili_api_async, main.TOOL_CALL_TIMEOUT
+    main.bili_api_async, main.TOOL_CALL_TIMEOUT = api, timeout
+    try:
+        start = time.monotonic()
+        output = call()
+        return output, time.monotonic() - start
+    finally:
+        main.bili_api_async, main.TOOL_CALL_TIMEOUT = original_api, original_timeout
+
+
+def test_deadline_context():
+    """测试截止时间的嵌套和跨线程传递"""
+    print("⏳ 测试截止时间上下文")
+    print("=" * 50)
+    
+    assert remaining_budget() is None and within_deadline(1000)
+    with call_deadline(10):
+        assert 9 < remaining_budget() <= 10
+        with call_deadline(60):
+            assert remaining_budget() <= 10, "嵌套时取更早的截止时间"
+        with call_deadline(2):
+            assert remaining_budget() <= 2
+            assert within_deadline(0.5) and not within_deadline(1.5)
+        
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            plain = executor.submit(remaining_budget).result()
+            carried = executor.submit(carry_deadline(remaining_budget)).result()
+        assert plain is None and carried is not None and carried <= 10, "线程池中需要显式继承截止时间"
+    assert remaining_budget() is None
+    print("✅ 截止时间可以嵌套并传递到线程池")
+
+
+def test_retry_loop_respects_deadline():
+    """测试412重试在剩余时间不足以退避时立即放弃"""
+    print("\n🔁 测试重试预算")
+    print("=" * 50)
+    
+    requests_seen = []
+    
+    async def handler(request):
+        requests_seen.append(request.url.path)
+        return httpx.Response(412)
+    
+    api = make_api(handler)
+    api.retry_delay_base = 2
+    
+    async def run():
+        try:
+            with call_deadline(3):
+                return await api._make_request("https://api.bilibili.com/x/web-interface/view", params={"bvid": "BV1"})
+        finally:
+            await api.aclose()
+    
+    start = time.monotonic()
+    result = asyncio.run(run())
+    elapsed = time.monotonic() - start
+    print(f"   请求{len(requests_seen)}次, 耗时{elapsed:.2f}秒, 结果: {result}")
+    assert result.get("deadline_exceeded"), "剩余时间不足时应返回截止结果"
+    assert elapsed < 3.0, "不应等待超出截止时间的退避"
+    print("✅ 剩余时间不足时跳过退避和重试")
+
+
+def test_skipped_request_keeps_token():
+    """测试因剩余时间不足而放弃的请求归还预约的令牌（账号和代理两个令牌桶）"""
+    print("\n🪙 测试放弃的请求不占用限速额度")
+    print("=" * 50)
+    
+    url = "https://api.bilibili.com/x/web-interface/view"
+    
+    async def handler(request):
+        return httpx.Response(200, json={"code": 0, "data": {"bvid": request.url.params["bvid"]}})
+    
+    api = make_api(handler, {"view": (0.5, 1)})
+    
+    async def run():
+        try:
+            await api._make_request(url, params={"bvid": "BV1"})
+            before = api.rate_limiter.bucket("view").available()
+            with call_deadline(1.5):
+                result = await api._make_request(url, params={"bvid": "BV2"})
+            return result, before, api.rate_limiter.bucket("view").available()
+        finally:
+            await api.aclose()
+    
+    result, before, after = asyncio.run(run())
+    print(f"   异步: 令牌 {before:.2f} -> {after:.2f}, 结果: {result}")
+    assert result.get("deadline_exceeded")
+    assert after > before - 0.5, "放弃的请求应归还令牌"
+    
+    limiter = RateLimiter({"view": (0.5, 1)}, jitter=0, adaptive=False)
+    sync_api = BilibiliAPI(cookies={}, rate_limiter=limiter, cache=ResponseCache(), proxy_pool=ProxyPool(["http://127.0.0.1:9"]))
+    proxy = sync_api._select_proxy()
+    limiter.reserve(url, sync_api.identity)
+    limiter.reserve(url, proxy.identity)
+    with call_deadline(1.5):
+        result = sync_api._make_request_with_retry(url, params={"bvid": "BV3"})
+    tokens = [limiter.bucket("view", identity).available() for identity in (sync_api.identity, proxy.identity)]
+    print(f"   同步: 令牌 {[round(token, 2) for token in tokens]}, 结果: {result}")
+    assert result.get("deadline_exceeded")
+    assert min(tokens) > -0.5, "账号和代理的令牌都应归还"
+    print("✅ 放弃的请求不消耗令牌桶额度")
+
+
+def test_search_returns_on_time():
+    """测试用户搜索在端点间限速等待超出预算时按时返回"""
+    print("\n🔍 测试用户搜索按时返回")
+    print("=" * 50)
+    
+    async def handler(request):
+        return httpx.Response(200, json={"code": -799, "message": "请求过于频繁，请稍后再试"})
+    
+    # 搜索端点族5秒一次：第二个端点的等待超出3秒预算
+    api = make_api(handler, {"search": (0.2, 1), "nav": (0.0, 1), "default": (0.0, 1)})
+    output, elapsed = run_tool(api, 3.0, lambda: main.search_user_by_nickname("测试", output_format="compact"))
+    print(f"   耗时{elapsed:.2f}秒")
+    assert elapsed < 3.0, "应在调用时限内返回"
+    assert json.loads(output)["data"]["count"] == 0
+    print("✅ 搜索在时限内返回失败结果")
+
+
+def test_hard_timeout():
+    """测试上游一直不响应时返回超时结果"""
+    print("\n⏰ 测试超时结果")
+    print("=" * 50)
+    
+    async def handler(request):
+        await asyncio.sleep(30)
+        return httpx.Response(200, json={"code": 0, "data": {}})
+    
+    output, elapsed = run_tool(make_api(handler), 3.0, lambda: main.get_video_stat("BV17x411w7KC", output_format="compact"))
+    print(f"   耗时{elapsed:.2f}秒, 输出: {output}")
+    assert elapsed < 3.5
+    assert json.loads(output)["code"] == -1 and "超时" in json.loads(output)["message"]
+    print("✅ 到达时限后返回超时结果")
+
+
+def test_partial_comments():
+    """测试多页评论在时限内返回已获取的部分"""
+    print("\n📄 测试部分结果")
+    print("=" * 50)
+    
+    async def handler(request):
+        await asyncio.sleep(0.4)
+        page = int(request.url.params["pn"])
+        replies = [{"rpid": page * 100 + i, "like": i, "member": {"uname": f"用户{i}"}, "content": {"message": "评论"}}
+                   for i in range(20)]
+        return httpx.Response(200, json={"code": 0, "data": {"page": {"num": page, "size": 20, "count": 10000}, "replies": replies}})
+    
+    output, elapsed = run_tool(make_api(handler), 2.5, lambda: main.collect_video_comments("170001", limit=1000, time_budget=60, output_format="compact"))
+    data = json.loads(output)["data"]
+    print(f"   耗时{elapsed:.2f}秒, 获取{data['count']}条评论, {data['pages']}页, 停止原因: {data['stop_reason']}")
+    assert elapsed < 2.5 and data["count"] > 0 and data["stop_reason"] == "time_budget"
+    print("✅ 按时返回已获取的评论")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试调用截止时间...")
+    
+    test_deadline_context()
+    test_retry_loop_respects_deadline()
+    test_skipped_request_keeps_token()
+    test_search_returns_on_time()
+    test_hard_timeout()
+    test_partial_comments()
+    
+    print("\n" + "=" * 60)
+    print("🎉 调用截止时间测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
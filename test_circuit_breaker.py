@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+测试回退链的端点熔断
+验证熔断器的closed/open/half_open状态切换、最近可用端点优先，以及熔断中的端点不再产生网络请求
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+from main import AsyncBilibiliAPI, BilibiliAPI, RateLimiter, ResponseCache, CircuitBreaker, EndpointRouter
+
+VIDEOS = [{"bvid": f"BV1circuit{i}", "title": f"视频{i}", "owner": {"name": "UP"}, "stat": {"view": i}} for i in range(5)]
+
+
+def make_api(handler) -> AsyncBilibiliAPI:
+    limiter = RateLimiter({family: (0.0, 1) for family in ("search", "popular", "nav", "default")}, jitter=0)
+    router = EndpointRouter(min_calls=3, cooldown=60)
+    return AsyncBilibiliAPI(cookies={}, rate_limiter=limiter, cache=ResponseCache(), router=router,
+                            transport=httpx.MockTransport(handler))
+
+
+def test_breaker_states():
+    """测试熔断器状态切换"""
+    print("🔌 测试熔断器状态")
+    print("=" * 50)
+    
+    breaker = CircuitBreaker(window=10, min_calls=4, failure_rate=0.5, cooldown=0.2)
+    for success in (True, False, True):
+        assert breaker.allow()
+        breaker.record(success)
+    assert breaker.state == "closed", "调用数不足min_calls时不熔断"
+    breaker.record(False)
+    assert breaker.state == "open", "失败率达到50%时熔断"
+    assert not breaker.allow() and breaker.skipped == 1
+    
+    time.sleep(0.25)
+    assert breaker.allow() and breaker.state == "half_open", "冷却结束后放行探测请求"
+    assert not breaker.allow(), "半开状态只放行一个探测请求"
+    breaker.record(False)
+    assert breaker.state == "open", "探测失败重新熔断"
+    
+    time.sleep(0.25)
+    assert breaker.allow()
+    breaker.record(True)
+    assert breaker.state == "closed" and breaker.allow(), "探测成功恢复正常"
+    
+    breaker.record(None)
+    assert breaker.describe()["recent_calls"] == 0, "与端点无关的结果不计入统计"
+    print("✅ closed/open/half_open状态切换正确")
+
+
+def test_router_plan():
+    """测试最近可用端点优先和熔断端点跳过"""
+    print("\n🧭 测试端点调度")
+    print("=" * 50)
+    
+    router = EndpointRouter(min_calls=2, cooldown=60)
+    endpoints = [{"name": "A"}, {"name": "B"}, {"name": "C"}]
+    assert [e["name"] for e in router.plan("chain", endpoints)] == ["A", "B", "C"]
+    
+    router.record("chain", "B", True)
+    assert [e["name"] for e in router.plan("chain", endpoints)] == ["B", "A", "C"], "最近可用端点排在最前"
+    
+    router.record("chain", "A", False)
+    router.record("chain", "A", False)
+    assert [e["name"] for e in router.plan("chain", endpoints)] == ["B", "C"], "熔断中的端点被跳过"
+    assert router.describe()["chain/A"]["state"] == "open"
+    assert router.describe()["chain/B"]["last_good"]
+    print("✅ 端点按最近可用优先，熔断端点被跳过")
+
+
+def test_trending_remembers_last_good():
+    """测试热门视频回退链记住可用端点"""
+    print("\n🔥 测试热门视频回退链")
+    print("=" * 50)
+    
+    calls = {"popular": 0, "ranking": 0}
+    
+    async def handler(request):
+        if request.url.path.endswith("/popular"):
+            calls["popular"] += 1
+            return httpx.Response(200, headers={"content-type": "text/html"}, content=b"<html>challenge</html>")
+        calls["ranking"] += 1
+        return httpx.Response(200, json={"code": 0, "data": {"list": VIDEOS}})
+    
+    api = make_api(handler)
+    
+    async def run():
+        try:
+            results = []
+            for _ in range(5):
+                api.cache.clear()
+                results.append(await api.get_trending_videos())
+            return results
+        finally:
+            await api.aclose()
+    
+    results = asyncio.run(run())
+    print(f"   5次调用: popular请求{calls['popular']}次, ranking请求{calls['ranking']}次")
+    assert all(r["data"]["list"] for r in results)
+    assert calls["popular"] == 1 and calls["ranking"] == 5, "之后的调用直接使用最近可用端点"
+    print("✅ 失败端点不再每次消耗一次往返")
+
+
+def test_search_breaker_skips_round_trips():
+    """测试视频搜索接口持续失败时熔断，直接使用热门视频替代"""
+    print("\n🔍 测试视频搜索熔断")
+    print("=" * 50)
+    
+    calls = {"search": 0, "popular": 0}
+    
+    async def handler(request):
+        if "/search/" in request.url.path:
+            calls["search"] += 1
+            return httpx.Response(200, headers={"content-type": "text/html"}, content=b"<html>verify</html>")
+        calls["popular"] += 1
+        return httpx.Response(200, json={"code": 0, "data": {"list": VIDEOS}})
+    
+    api = make_api(handler)
+    
+    async def run():
+        try:
+            return [await api.search_videos("测试") for _ in range(8)]
+        finally:
+            await api.aclose()
+    
+    results = asyncio.run(run())
+    print(f"   8次搜索: 搜索接口请求{calls['search']}次, 热门接口请求{calls['popular']}次")
+    assert calls["search"] == 3, "失败3次后熔断，不再请求搜索接口"
+    assert calls["popular"] == 1, "热门视频替代结果来自缓存"
+    assert "熔断" in results[-1]["data"]["note"]
+    print("✅ 熔断后跳过搜索接口")
+
+
+def test_exception_releases_probe():
+    """测试搜索端点抛出异常时记录失败并释放半开熔断器的探测名额"""
+    print("\n💥 测试异常释放探测名额")
+    print("=" * 50)
+    
+    router = EndpointRouter(min_calls=1, cooldown=0.05)
+    api = BilibiliAPI(cookies={}, rate_limiter=RateLimiter({"search": (0.0, 1)}, jitter=0),
+                      cache=ResponseCache(), router=router)
+    endpoint = api._user_search_endpoints("测试")[-1]
+    breaker = router.breaker("user_search", endpoint["name"])
+    breaker.record(False)
+    time.sleep(0.06)
+    assert router.allow("user_search", endpoint["name"]) and breaker.state == "half_open"
+    
+    def broken_request(url, **kwargs):
+        raise ConnectionError("连接被重置")
+    
+    api._make_request = broken_request
+    try:
+        api._try_user_search_endpoint(endpoint)
+        assert False, "异常应继续抛给调用方"
+    except ConnectionError:
+        pass
+    print(f"   同步: 熔断器状态 {breaker.state}")
+    assert breaker.state == "open", "探测失败应重新熔断，而不是一直停在半开状态"
+    time.sleep(0.06)
+    assert router.allow("user_search", endpoint["name"]), "冷却后可以再次探测"
+    
+    async_api = make_api(lambda request: httpx.Response(200, json={"code": 0, "data": {"result": []}}))
+    async_api.router = EndpointRouter(min_calls=1, cooldown=0.05)
+    async_breaker = async_api.router.breaker("user_search", endpoint["name"])
+    async_breaker.record(False)
+    time.sleep(0.06)
+    assert async_api.router.allow("user_search", endpoint["name"])
+    
+    async def broken_async_request(url, **kwargs):
+        raise ConnectionError("连接被重置")
+    
+    async_api._make_request = broken_async_request
+    try:
+        asyncio.run(async_api._try_user_search_endpoint(endpoint))
+        assert False, "异常应继续抛给调用方"
+    except ConnectionError:
+        pass
+    print(f"   异步: 熔断器状态 {async_breaker.state}")
+    assert async_breaker.state == "open"
+    print("✅ 抛出异常的探测请求记为失败，熔断器不会卡在半开状态")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试端点熔断...")
+    
+    test_breaker_states()
+    test_router_plan()
+    test_trending_remembers_last_good()
+    test_search_breaker_skips_round_trips()
+    test_exception_releases_probe()
+    
+    print("\n" + "=" * 60)
+    print("🎉 端点熔断测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+测试多页评论获取
+使用httpx.MockTransport模拟评论接口，验证BV号本地换算、按需翻页、数量上限和时间上限
+"""
+
+import asyncio
+import json
+import sys
+import os
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+import main
+from main import AsyncBilibiliAPI, RateLimiter, bvid_to_aid
+
+TOTAL_COMMENTS = 95
+
+
+class MockReplyServer:
+    """模拟评论接口，共TOTAL_COMMENTS条评论"""
+    
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = []
+    
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        self.requests.append(dict(params))
+        await asyncio.sleep(self.latency)
+        if request.url.path.endswith("/view"):
+            return httpx.Response(500)
+        
+        page, size = int(params["pn"]), int(params.get("ps", 20))
+        start = (page - 1) * size
+        replies = [
+            {"rpid": i, "like": TOTAL_COMMENTS - i, "rcount": 0, "ctime": 1700000000 + i,
+             "member": {"uname": f"用户{i}", "mid": 1000 + i}, "content": {"message": f"第{i}条评论"}}
+            for i in range(start, min(start + size, TOTAL_COMMENTS))
+        ]
+        return httpx.Response(200, json={"code": 0, "data": {
+            "page": {"num": page, "size": size, "count": TOTAL_COMMENTS}, "replies": replies
+        }})
+
+
+def make_api(server: MockReplyServer) -> AsyncBilibiliAPI:
+    """创建不限速的测试实例"""
+    limiter = RateLimiter({"reply": (0.0, 1)}, jitter=0)
+    return AsyncBilibiliAPI(cookies={}, rate_limiter=limiter, transport=httpx.MockTransport(server.handler))
+
+
+def test_bvid_to_aid():
+    """测试BV号本地换算"""
+    print("🔢 测试BV号换算")
+    print("=" * 50)
+    
+    assert bvid_to_aid("BV17x411w7KC") == 170001
+    assert bvid_to_aid("BV1L9Uoa9EUx") == 111298867365120
+    assert bvid_to_aid("BV123") is None
+    print("✅ BV号换算正确，无效BV号返回None")
+
+
+def test_pager_stops_at_limit():
+    """测试达到数量上限后不再请求下一页"""
+    print("\n📄 测试数量上限")
+    print("=" * 50)
+    
+    server = MockReplyServer()
+    
+    async def run():
+        api = make_api(server)
+        state = {}
+        replies = [r async for r in api.iter_video_comments("170001", limit=45, state=state)]
+        everything = [r async for r in api.iter_video_comments("170001", sort_type=0)]
+        await api.aclose()
+        return replies, state, everything
+    
+    replies, state, everything = asyncio.run(run())
+    print(f"📊 获取{len(replies)}条，请求{state['pages']}页，停止原因: {state['stop_reason']}")
+    
+    assert len(replies) == 45 and state["stop_reason"] == "limit"
+    assert state["pages"] == 3, "45条评论只需要请求3页"
+    assert all(r["ps"] == "20" for r in server.requests)
+    assert len(everything) == TOTAL_COMMENTS, "不设上限时应取完全部评论"
+    print("✅ 使用最大页大小，按需翻页并在达到上限时停止")
+
+
+def test_pager_time_budget():
+    """测试超出时间上限后返回已获取的评论"""
+    print("\n⏱️ 测试时间上限")
+    print("=" * 50)
+    
+    server = MockReplyServer(latency=0.15)
+    
+    async def run():
+        api = make_api(server)
+        state = {}
+        replies = [r async for r in api.iter_video_comments("170001", time_budget=0.2, state=state)]
+        await api.aclose()
+        return replies, state
+    
+    replies, state = asyncio.run(run())
+    print(f"📊 获取{len(replies)}条，请求{state['pages']}页，停止原因: {state['stop_reason']}")
+    
+    assert state["stop_reason"] == "time_budget"
+    assert 0 < state["pages"] < 5
+    print("✅ 超时后停止翻页")
+
+
+def test_tool_without_video_lookup():
+    """测试工具对BV号不再请求视频信息接口"""
+    print("\n🛠️ 测试多页评论工具")
+    print("=" * 50)
+    
+    server = MockReplyServer()
+    original = main.bili_api_async
+    main.bili_api_async = make_api(server)
+    try:
+        output = main.collect_video_comments("BV17x411w7KC", limit=30)
+    finally:
+        main.bili_api_async = original
+    
+    result = json.loads(output)
+    print(f"📊 返回{result['data']['count']}条，请求{len(server.requests)}次")
+    
+    assert result["data"]["aid"] == "170001"
+    assert result["data"]["count"] == 30
+    assert all(r["oid"] == "170001" for r in server.requests), "不应请求视频信息接口"
+    print("✅ BV号本地换算，一次调用返回多页评论")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试多页评论获取...")
+    
+    test_bvid_to_aid()
+    test_pager_stops_at_limit()
+    test_pager_time_budget()
+    test_tool_without_video_lookup()
+    
+    print("\n" + "=" * 60)
+    print("🎉 多页评论获取测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+测试评论串展开
+使用httpx.MockTransport模拟评论和楼中楼回复接口，验证并发展开、每串回复上限和单串错误处理
+"""
+
+import asyncio
+import inspect
+import json
+import sys
+import os
+import time
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+import main
+from main import AsyncBilibiliAPI, RateLimiter
+
+# 模拟接口的网络延迟（秒）
+MOCK_LATENCY = 0.1
+# 每条根评论的回复数：rpid为3的倍数时没有回复，rpid为13时回复接口报错
+REPLIES_PER_ROOT = 45
+
+
+def reply_count(rpid: int) -> int:
+    return 0 if rpid % 3 == 0 else REPLIES_PER_ROOT
+
+
+class MockThreadServer:
+    """模拟评论和楼中楼回复接口"""
+    
+    def __init__(self):
+        self.reply_requests = []
+    
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        await asyncio.sleep(MOCK_LATENCY)
+        page, size = int(params["pn"]), int(params.get("ps", 20))
+        
+        if request.url.path.endswith("/reply/reply"):
+            root = int(params["root"])
+            self.reply_requests.append((root, page))
+            if root == 13:
+                return httpx.Response(200, json={"code": 12022, "message": "已经被删除了"})
+            total = reply_count(root)
+            replies = [{"rpid": root * 1000 + i, "root": root, "member": {"uname": f"回复者{i}"},
+                        "content": {"message": f"回复{i}"}}
+                       for i in range((page - 1) * size, min(page * size, total))]
+            return httpx.Response(200, json={"code": 0, "data": {
+                "page": {"num": page, "size": size, "count": total}, "replies": replies,
+                "root": {"rpid": root, "rcount": total, "content": {"message": f"根评论{root}"}}
+            }})
+        
+        roots = [{"rpid": i, "rcount": reply_count(i), "content": {"message": f"根评论{i}"}}
+                 for i in range((page - 1) * size + 1, page * size + 1)]
+        return httpx.Response(200, json={"code": 0, "data": {
+            "page": {"num": page, "size": size, "count": 200}, "replies": roots
+        }})
+
+
+def make_api(server: MockThreadServer) -> AsyncBilibiliAPI:
+    """创建不限速的测试实例"""
+    limiter = RateLimiter({"reply": (0.0, 1)}, jitter=0)
+    return AsyncBilibiliAPI(cookies={}, rate_limiter=limiter, transport=httpx.MockTransport(server.handler))
+
+
+def test_top_roots_concurrent():
+    """测试展开前N条根评论：无回复的评论不请求，各评论串并发获取"""
+    print("🧵 测试展开热门评论串")
+    print("=" * 50)
+    
+    server = MockThreadServer()
+    
+    async def run():
+        api = make_api(server)
+        start = time.perf_counter()
+        result = await api.get_comment_threads("170001", top_n=9, max_replies_per_thread=30)
+        elapsed = time.perf_counter() - start
+        await api.aclose()
+        return result, elapsed
+    
+    result, elapsed = asyncio.run(run())
+    threads = result["data"]["threads"]
+    print(f"📊 {result['stats']}, 耗时: {elapsed:.2f}秒, 回复请求: {len(server.reply_requests)}次")
+    
+    assert [t["root_rpid"] for t in threads] == [str(i) for i in range(1, 10)]
+    assert all(r % 3 != 0 for r, _ in server.reply_requests), "没有回复的根评论不应请求"
+    assert len(threads[0]["replies"]) == 30 and threads[0]["truncated"]
+    assert threads[2]["replies"] == [] and not threads[2]["truncated"]
+    # 1页根评论 + 6个评论串各2页，串行至少需要13次延迟
+    assert elapsed < MOCK_LATENCY * 6, "评论串没有并发展开"
+    print("✅ 评论串并发展开，每串回复数受上限约束")
+
+
+def test_explicit_roots_and_errors():
+    """测试指定根评论ID展开完整回复串，单个评论串出错不影响其他"""
+    print("\n🛟 测试指定根评论")
+    print("=" * 50)
+    
+    server = MockThreadServer()
+    
+    async def run():
+        api = make_api(server)
+        result = await api.get_comment_threads("170001", root_rpids=["4", "13", "4"])
+        await api.aclose()
+        return result
+    
+    result = asyncio.run(run())
+    threads = result["data"]["threads"]
+    print(f"📊 {result['stats']}")
+    
+    assert len(threads) == 2
+    assert len(threads[0]["replies"]) == REPLIES_PER_ROOT and threads[0]["root"]["rpid"] == 4
+    assert threads[0]["total_replies"] == REPLIES_PER_ROOT
+    assert threads[1]["error"] == "已经被删除了"
+    assert result["stats"]["failed"] == 1
+    print("✅ 完整回复串已展开，出错的评论串单独记录错误")
+
+
+def test_tool_output():
+    """测试评论串工具的紧凑输出"""
+    print("\n🛠️ 测试评论串工具")
+    print("=" * 50)
+    
+    server = MockThreadServer()
+    original = main.bili_api_async
+    main.bili_api_async = make_api(server)
+    try:
+        output = main.get_comment_threads("BV17x411w7KC", top_n=2, max_replies_per_thread=5)
+    finally:
+        main.bili_api_async = original
+    
+    result = json.loads(output)
+    first = result["data"]["threads"][0]
+    print(f"📏 输出长度: {len(output)}字符")
+    
+    assert "\n" not in output
+    assert first["root"]["message"] == "根评论1"
+    assert [r["message"] for r in first["replies"]] == [f"回复{i}" for i in range(5)]
+    
+    entry_points = (main.get_comment_threads, main.get_comment_threads_async,
+                    main.bili_api_async.get_comment_threads, main.bili_api.get_comment_threads)
+    defaults = {inspect.signature(func).parameters["max_replies_per_thread"].default for func in entry_points}
+    assert defaults == {main.THREAD_MAX_REPLIES}, "工具和API方法的每串回复上限默认值应一致"
+    print("✅ 一次调用返回嵌套评论串")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试评论串展开...")
+    
+    test_top_roots_concurrent()
+    test_explicit_roots_and_errors()
+    test_tool_output()
+    
+    print("\n" + "=" * 60)
+    print("🎉 评论串展开测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+测试cookie热切换
+验证原地更新cookie后连接池、WBI密钥、请求统计和公开数据缓存都保留，
+后续请求使用新cookie，只有随登录身份变化的缓存（导航信息）失效
+"""
+
+import asyncio
+import json
+import sys
+import os
+import tempfile
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+import main
+from main import AsyncBilibiliAPI, CookiePool, CookieProfile, RateLimiter, ResponseCache, SQLiteCacheStore, WbiSigner
+
+VIEW_URL = "https://api.bilibili.com/x/web-interface/view"
+NAV_URL = "https://api.bilibili.com/x/web-interface/nav"
+OLD_COOKIES = {"SESSDATA": "old_sessdata_value", "bili_jct": "old_bili_jct_value", "DedeUserID": "1001"}
+NEW_COOKIES = {"SESSDATA": "new_sessdata_value", "bili_jct": "new_bili_jct_value", "DedeUserID": "2002"}
+
+
+def make_api(seen: list) -> AsyncBilibiliAPI:
+    async def handler(request):
+        cookies = dict(part.strip().split("=", 1) for part in request.headers.get("cookie", "").split(";") if "=" in part)
+        seen.append((request.url.path, cookies.get("DedeUserID")))
+        if request.url.path.endswith("/nav"):
+            return httpx.Response(200, json={"code": 0, "data": {"isLogin": True, "mid": int(cookies["DedeUserID"]),
+                                                                  "wbi_img": {"img_url": "a/img.png", "sub_url": "b/sub.png"}}})
+        return httpx.Response(200, json={"code": 0, "data": {"bvid": request.url.params["bvid"], "title": "公开视频"}})
+    
+    limiter = RateLimiter({family: (0.0, 1) for family in ("view", "nav", "default")}, jitter=0)
+    return AsyncBilibiliAPI(cookies=dict(OLD_COOKIES), rate_limiter=limiter, cache=ResponseCache(),
+                            wbi_signer=WbiSigner(), transport=httpx.MockTransport(handler))
+
+
+def test_update_in_place():
+    """测试原地更新cookie保留连接池、统计和公开数据缓存"""
+    print("🔄 测试原地更新cookie")
+    print("=" * 50)
+    
+    seen = []
+    api = make_api(seen)
+    
+    async def run():
+        try:
+            await api.get_video_info("BV1swap00001")
+            assert await api._update_wbi_keys()
+            nav_before = await api._get_nav_info()
+            client, total = api._get_client(), api.request_total_count
+            
+            api.update_cookies(dict(NEW_COOKIES))
+            
+            view = await api.get_video_info("BV1swap00001")
+            nav_after = await api._get_nav_info()
+            await api.get_video_info("BV1swap00002")
+            return nav_before, nav_after, view, client is api._get_client(), total
+        finally:
+            await api.aclose()
+    
+    nav_before, nav_after, view, same_client, total = asyncio.run(run())
+    print(f"   上游请求: {seen}")
+    assert same_client, "更新cookie不重建HTTP客户端（保留连接池）"
+    assert view["data"]["title"] == "公开视频" and seen.count(("/x/web-interface/view", "1001")) == 1, "公开数据缓存保留"
+    assert nav_before["data"]["mid"] == 1001 and nav_after["data"]["mid"] == 2002, "导航信息随身份失效并重新获取"
+    assert seen[-1] == ("/x/web-interface/view", "2002"), "后续请求使用新cookie"
+    assert api.identity == "uid:2002" and api.request_total_count > total >= 2, "请求统计保留"
+    assert api.wbi.has_usable_keys(), "WBI密钥保留"
+    print("✅ 只有身份相关缓存失效，其余状态保留")
+
+
+def test_tool_keeps_instances():
+    """测试set_bilibili_cookies工具在现有实例上更新，不重新读取cookie文件"""
+    print("\n🛠️ 测试set_bilibili_cookies工具")
+    print("=" * 50)
+    
+    original = main.bili_api, main.bili_api_async, main.BILIBILI_COOKIES
+    sync_api, async_api = make_api([]), make_api([])
+    main.bili_api, main.bili_api_async = sync_api, async_api
+    load_calls = []
+    original_loader = main.BilibiliAPI._load_cookies_from_file
+    main.BilibiliAPI._load_cookies_from_file = lambda self: load_calls.append(1)
+    try:
+        output = main.set_bilibili_cookies(json.dumps(NEW_COOKIES))
+        print(f"   {output.splitlines()[0]}")
+        assert main.bili_api is sync_api and main.bili_api_async is async_api, "保留现有API实例"
+        assert async_api.identity == sync_api.identity == "uid:2002"
+        assert dict(async_api.session.cookies)["SESSDATA"] == NEW_COOKIES["SESSDATA"]
+        assert not load_calls, "不重新读取cookie文件"
+    finally:
+        main.BilibiliAPI._load_cookies_from_file = original_loader
+        main.bili_api, main.bili_api_async, main.BILIBILI_COOKIES = original
+    print("✅ 工具原地更新cookie")
+
+
+def test_tool_with_cookie_pool():
+    """测试启用cookie池时工具设置的cookie加入池中轮换，而不是被池中账号覆盖"""
+    print("\n🔀 测试cookie池下的set_bilibili_cookies")
+    print("=" * 50)
+    
+    pooled = {"SESSDATA": "pool_sessdata_value", "bili_jct": "pool_bili_jct_value",
+              "buvid3": "pool_buvid3_value", "DedeUserID": "3003"}
+    full_new = {**NEW_COOKIES, "buvid3": "new_buvid3_value"}
+    original = main.bili_api, main.bili_api_async, main.BILIBILI_COOKIES, main.cookie_pool
+    main.bili_api, main.bili_api_async = make_api([]), make_api([])
+    pool = main.cookie_pool = CookiePool([CookieProfile("主账号", pooled)])
+    try:
+        output = main.set_bilibili_cookies(json.dumps(full_new))
+        names = [profile.name for profile in pool.profiles]
+        print(f"   池中账号: {names}")
+        assert names == ["主账号", main.MANUAL_COOKIE_PROFILE] and "加入轮换" in output
+        added = pool.profiles[1]
+        added.cooldown_until = float("inf")
+        
+        renewed = {**full_new, "SESSDATA": "renewed_sessdata_value"}
+        main.set_bilibili_cookies(json.dumps(renewed))
+        assert len(pool.profiles) == 2 and pool.profiles[1] is added, "同一账号原地更新"
+        assert dict(added.session.cookies)["SESSDATA"] == "renewed_sessdata_value"
+        assert added.cooldown_until == 0.0, "更新后重置冷却"
+        
+        main.set_bilibili_cookies(json.dumps({**pooled, "SESSDATA": "pool_sessdata_renewed"}))
+        assert len(pool.profiles) == 2
+        assert dict(pool.profiles[0].session.cookies)["SESSDATA"] == "pool_sessdata_renewed", "池中已有账号按身份更新"
+        
+        output = main.set_bilibili_cookies(json.dumps({"SESSDATA": "partial_sessdata_value", "DedeUserID": "4004"}))
+        print(f"   不完整cookie: {[line for line in output.splitlines() if 'cookie池' in line]}")
+        assert len(pool.profiles) == 2 and "未加入cookie池" in output, "说明池中账号优先"
+    finally:
+        main.bili_api, main.bili_api_async, main.BILIBILI_COOKIES, main.cookie_pool = original
+    print("✅ cookie池启用时新cookie参与轮换")
+
+
+def test_persistent_identity_entries():
+    """测试持久化缓存中只删除身份相关的条目"""
+    print("\n💾 测试持久化缓存失效")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteCacheStore(os.path.join(tmp, "cache.sqlite3"))
+        cache = ResponseCache(store=store)
+        view_key = ResponseCache.make_key(VIEW_URL, {"bvid": "BV1swapdisk1"})
+        cache.set(view_key, VIEW_URL, {"code": 0, "data": {"title": "公开"}})
+        cache.set(NAV_URL, NAV_URL, {"code": 0, "data": {"isLogin": True}})
+        
+        removed = cache.invalidate_families(main.IDENTITY_FAMILIES)
+        print(f"   删除内存条目{removed}条, 持久化: {store.stats()['entries']}条")
+        assert removed == 1
+        assert store.get(NAV_URL) is None and store.get(view_key) is not None
+        assert cache.get(NAV_URL) is None and cache.get(view_key)["data"]["title"] == "公开"
+        store.close()
+    print("✅ 公开数据的持久化缓存保留")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试cookie热切换...")
+    
+    test_update_in_place()
+    test_tool_keeps_instances()
+    test_tool_with_cookie_pool()
+    test_persistent_identity_entries()
+    
+    print("\n" + "=" * 60)
+    print("🎉 cookie热切换测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
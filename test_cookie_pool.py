@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+测试多账号cookie池
+验证cookie池的加载格式、请求在各账号间轮流调度（各账号独立限速，总吞吐随账号数增加），
+以及账号被限流或登录失效后进入冷却、所有账号冷却时回退到默认cookie
+"""
+
+import asyncio
+import json
+import sys
+import os
+import tempfile
+import time
+
+import httpx
+import requests
+
+sys.path.append(os.path.dirname(__file__))
+
+from main import (AsyncBilibiliAPI, BilibiliAPI, RateLimiter, ResponseCache, CookiePool, CookieProfile,
+                  load_cookie_pool)
+
+VIDEO_URL = "https://api.bilibili.com/x/web-interface/view"
+
+
+def account(uid: int) -> dict:
+    return {"SESSDATA": f"sessdata_value_{uid:06d}", "bili_jct": f"bili_jct_value_{uid}", "buvid3": f"buvid3-value-{uid:06d}",
+            "DedeUserID": str(uid)}
+
+
+def make_pool(count: int) -> CookiePool:
+    return CookiePool([CookieProfile(f"账号{uid}", account(uid)) for uid in range(1, count + 1)])
+
+
+def make_api(handler, pool) -> AsyncBilibiliAPI:
+    limiter = RateLimiter({"view": (4.0, 1), "default": (0.0, 1)}, jitter=0, adaptive=False)
+    api = AsyncBilibiliAPI(cookies={}, rate_limiter=limiter, cache=ResponseCache(),
+                           transport=httpx.MockTransport(handler), cookie_pool=pool)
+    api.retry_delay_base = 0
+    return api
+
+
+def request_uid(request) -> str:
+    """从请求的Cookie头中取出账号ID（无cookie时为anonymous）"""
+    cookies = dict(part.strip().split("=", 1) for part in request.headers.get("cookie", "").split(";") if "=" in part)
+    return cookies.get("DedeUserID", "anonymous")
+
+
+def test_load_formats():
+    """测试目录和多账号JSON文件两种格式"""
+    print("📂 测试cookie池加载")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        pool_dir = os.path.join(tmp, "cookie_pool")
+        os.makedirs(pool_dir)
+        for name, cookies in (("main", account(1)), ("backup", account(2)), ("broken", {"SESSDATA": "your_sessdata"}),
+                              ("same_account", account(1))):
+            with open(os.path.join(pool_dir, f"{name}.json"), "w", encoding="utf-8") as f:
+                json.dump(cookies, f)
+        pool = load_cookie_pool(pool_dir)
+        names = [profile["name"] for profile in pool.describe()]
+        print(f"   目录: {names}")
+        assert names == ["backup", "main"], "跳过无效和重复的账号"
+        
+        pool_file = os.path.join(tmp, "cookie_pool.json")
+        with open(pool_file, "w", encoding="utf-8") as f:
+            json.dump({"A": account(3), "B": account(4), "C": account(5)}, f)
+        pool = load_cookie_pool(pool_file)
+        print(f"   文件: {[(p.name, p.identity) for p in pool.profiles]}")
+        assert [p.identity for p in pool.profiles] == ["uid:3", "uid:4", "uid:5"]
+        assert pool.profiles[0].session.cookies.get("SESSDATA") == account(3)["SESSDATA"]
+        
+        assert load_cookie_pool(os.path.join(tmp, "missing")) is None
+    print("✅ 两种格式都能加载，无效账号被跳过")
+
+
+def test_throughput_scales():
+    """测试请求分摊到各账号，总吞吐随账号数增加"""
+    print("\n🚀 测试多账号吞吐")
+    print("=" * 50)
+    
+    async def run(pool, seen):
+        async def handler(request):
+            seen.append(request_uid(request))
+            return httpx.Response(200, json={"code": 0, "data": {"bvid": request.url.params["bvid"]}})
+        
+        api = make_api(handler, pool)
+        try:
+            start = time.monotonic()
+            results = await asyncio.gather(*[api.get_video_info(f"BV1pool{i:05d}") for i in range(12)])
+            assert all(r["code"] == 0 for r in results)
+            return time.monotonic() - start
+        finally:
+            await api.aclose()
+    
+    single_seen, pooled_seen = [], []
+    single = asyncio.run(run(make_pool(1), single_seen))
+    pooled = asyncio.run(run(make_pool(3), pooled_seen))
+    counts = {uid: pooled_seen.count(uid) for uid in sorted(set(pooled_seen))}
+    print(f"   1个账号: {single:.2f}秒; 3个账号: {pooled:.2f}秒, 各账号请求数: {counts}")
+    assert counts == {"1": 4, "2": 4, "3": 4}, "请求均匀分摊到各账号"
+    assert pooled < single / 2, "各账号独立限速，总吞吐随账号数增加"
+    print("✅ 总吞吐随账号数增加")
+
+
+def test_cooldown_and_fallback():
+    """测试被限流和登录失效的账号进入冷却，所有账号冷却时使用默认cookie"""
+    print("\n🧊 测试账号冷却")
+    print("=" * 50)
+    
+    seen = []
+    
+    async def handler(request):
+        uid = request_uid(request)
+        seen.append(uid)
+        if uid == "1":
+            return httpx.Response(412)
+        if uid == "2":
+            return httpx.Response(200, json={"code": -101, "message": "账号未登录"})
+        return httpx.Response(200, json={"code": 0, "data": {"uid": uid}})
+    
+    pool = make_pool(2)
+    api = make_api(handler, pool)
+    
+    async def run():
+        try:
+            first = await api.get_video_info("BV1cool00001")
+            second = await api.get_video_info("BV1cool00002")
+            return first, second
+        finally:
+            await api.aclose()
+    
+    first, second = asyncio.run(run())
+    status = {profile["name"]: profile for profile in pool.describe()}
+    print(f"   请求账号顺序: {seen}")
+    print(f"   账号状态: {status}")
+    assert seen[0] == "1" and seen[1] == "2", "412后重试换用其他账号"
+    assert first["code"] == -101
+    assert seen[2:] == ["anonymous"], "所有账号冷却中时使用默认cookie"
+    assert second["data"]["uid"] == "anonymous"
+    assert status["账号1"]["throttles"] == 1 and status["账号1"]["cooldown_seconds"] > 0
+    assert status["账号2"]["auth_failures"] == 1 and status["账号2"]["cooldown_seconds"] > status["账号1"]["cooldown_seconds"]
+    assert status["账号1"]["health"] < 1.0
+    print("✅ 异常账号进入冷却，请求转到其他身份")
+
+
+class FakeSession:
+    """记录请求并返回固定JSON的会话"""
+    
+    def __init__(self, name: str, calls: list):
+        self.name = name
+        self.calls = calls
+    
+    def get(self, url, **kwargs):
+        self.calls.append(self.name)
+        response = requests.models.Response()
+        response.status_code = 200
+        response.headers["content-type"] = "application/json"
+        response._content = b'{"code": 0, "data": {}}'
+        response.url = url
+        return response
+
+
+def test_sync_uses_profile_sessions():
+    """测试同步版本使用所选账号的会话"""
+    print("\n🧵 测试同步请求")
+    print("=" * 50)
+    
+    calls = []
+    pool = make_pool(2)
+    for profile in pool.profiles:
+        profile.session = FakeSession(profile.name, calls)
+    limiter = RateLimiter({"view": (0.0, 1), "default": (0.0, 1)}, jitter=0)
+    api = BilibiliAPI(cookies={}, rate_limiter=limiter, cache=ResponseCache(), cookie_pool=pool)
+    for i in range(4):
+        assert api.get_video_info(f"BV1sync0000{i}")["code"] == 0
+    print(f"   使用的会话: {calls}")
+    assert calls == ["账号1", "账号2", "账号1", "账号2"]
+    print("✅ 同步请求轮流使用各账号的会话")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试cookie池...")
+    
+    test_load_formats()
+    test_throughput_scales()
+    test_cooldown_and_fallback()
+    test_sync_uses_profile_sessions()
+    
+    print("\n" + "=" * 60)
+    print("🎉 cookie池测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+测试字段投影参数
+验证字段集只编译一次、只构建请求的字段、分组展开和原始路径读取，以及工具的fields参数
+"""
+
+import json
+import sys
+import os
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+import main
+from main import AsyncBilibiliAPI, RateLimiter, compile_fields
+
+VIDEO = {
+    "bvid": "BV17x411w7KC", "aid": 170001, "title": "投影测试", "duration": 125, "pubdate": 1700000000,
+    "owner": {"mid": 2, "name": "碧诗", "face": "https://i0.hdslb.com/face.jpg"},
+    "stat": {"vv": 12345, "like": 100, "coin": 20, "favorite": 30, "share": 5, "reply": 7, "danmaku": 9, "his_rank": 3},
+}
+
+
+def test_compile_once_and_project():
+    """测试相同字段集复用编译结果，只返回请求的字段"""
+    print("🎯 测试字段投影")
+    print("=" * 50)
+    
+    compile_fields.cache_clear()
+    extract = compile_fields("video", "title,bvid,stats.view,author.name")
+    assert compile_fields("video", "title,bvid,stats.view,author.name") is extract
+    info = compile_fields.cache_info()
+    print(f"📊 编译缓存: {info}")
+    assert info.hits == 1 and info.misses == 1
+    
+    record = extract(VIDEO)
+    print(f"📄 投影结果: {record}")
+    assert record == {"title": "投影测试", "bvid": "BV17x411w7KC", "stats": {"view": 12345}, "author": {"name": "碧诗"}}
+    print("✅ 只构建请求的字段，播放量兼容vv字段")
+
+
+def test_groups_and_raw_paths():
+    """测试分组展开和未预定义字段的原始路径读取"""
+    print("\n🧩 测试分组和原始路径")
+    print("=" * 50)
+    
+    record = compile_fields("video", "author,stat.his_rank,duration_formatted,missing.key")(VIDEO)
+    print(f"📄 投影结果: {record}")
+    assert set(record["author"]) == {"name", "mid", "face"}
+    assert record["stat"] == {"his_rank": 3}
+    assert record["duration_formatted"] == "2:05"
+    assert record["missing"] == {"key": None}
+    
+    comment = compile_fields("comment", "message,author.uname")(
+        {"content": {"message": "前排"}, "member": {"uname": "路人"}, "like": 3})
+    assert comment == {"message": "前排", "author": {"uname": "路人"}}
+    
+    for fields in ("title,title.x", "title.x,title", "author.name.first,author"):
+        record = compile_fields("video", fields)(VIDEO)
+        print(f"📄 冲突路径 {fields}: {record}")
+        head, _, tail = fields.partition(",")
+        deeper = max((head, tail), key=lambda path: path.count("."))
+        node = record
+        for part in deeper.split("."):
+            assert isinstance(node, dict), "路径冲突时更深的路径优先"
+            node = node[part]
+    assert set(compile_fields("video", "author.name.first,author")(VIDEO)["author"]) == {"name", "mid", "face"}
+    print("✅ 分组展开为全部子字段，原始路径直接读取接口数据，冲突路径不报错")
+
+
+def test_tool_fields():
+    """测试热门视频工具的fields参数缩小输出"""
+    print("\n🛠️ 测试工具fields参数")
+    print("=" * 50)
+    
+    async def handler(request):
+        return httpx.Response(200, json={"code": 0, "data": {"list": [VIDEO] * 10}})
+    
+    original = main.bili_api_async
+    main.bili_api_async = AsyncBilibiliAPI(cookies={}, rate_limiter=RateLimiter({"popular": (0.0, 1)}, jitter=0),
+                                           transport=httpx.MockTransport(handler))
+    try:
+        full = main.get_trending_videos(limit=10)
+        projected = main.get_trending_videos(limit=10, fields="title,stats.view")
+    finally:
+        main.bili_api_async = original
+    
+    result = json.loads(projected)
+    print(f"📏 默认视图: {len(full)}字符, 投影后: {len(projected)}字符")
+    assert result["data"]["list"][0] == {"title": "投影测试", "stats": {"view": 12345}}
+    assert len(projected) < len(full) / 5
+    print("✅ 工具只返回请求的字段")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试字段投影...")
+    
+    test_compile_once_and_project()
+    test_groups_and_raw_paths()
+    test_tool_fields()
+    
+    print("\n" + "=" * 60)
+    print("🎉 字段投影测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
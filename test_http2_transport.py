@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+测试异步客户端的HTTP/2传输
+验证HTTP/2开关的配置与回退、客户端连接池的协议设置，以及HTTP/2响应走原有的重试和解析流程
+"""
+
+import asyncio
+import sys
+import os
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+import main
+from main import AsyncBilibiliAPI, RateLimiter, ResponseCache
+
+VIDEO_URL = "https://api.bilibili.com/x/web-interface/view"
+
+
+def make_api(handler=None, http2=None) -> AsyncBilibiliAPI:
+    limiter = RateLimiter({family: (0.0, 1) for family in ("video", "nav", "default")}, jitter=0)
+    transport = httpx.MockTransport(handler) if handler else None
+    return AsyncBilibiliAPI(cookies={}, rate_limiter=limiter, cache=ResponseCache(), transport=transport, http2=http2)
+
+
+def test_http2_config():
+    """测试HTTP/2开关和缺少h2时的回退"""
+    print("⚙️ 测试HTTP/2配置")
+    print("=" * 50)
+    
+    assert make_api(http2=False).http2 is False
+    assert make_api().http2 is main.HTTP2_ENABLED, "未指定时使用BILIBILI_HTTP2配置"
+    
+    original = main.h2
+    main.h2 = None
+    try:
+        api = make_api(http2=True)
+        assert api.http2 is False, "未安装h2时回退到HTTP/1.1"
+        
+        async def run():
+            try:
+                return api._get_client()
+            finally:
+                await api.aclose()
+        
+        asyncio.run(run())  # 回退后创建客户端不会因缺少h2报错
+    finally:
+        main.h2 = original
+    print("✅ 未安装h2时回退HTTP/1.1")
+
+
+def test_client_pool_protocol():
+    """测试连接池按配置启用HTTP/2"""
+    print("\n🔗 测试连接池协议")
+    print("=" * 50)
+    
+    if main.h2 is None:
+        print("⚠️ 未安装h2，跳过连接池检查")
+        return
+    
+    async def pool_http2(http2):
+        api = make_api(http2=http2)
+        try:
+            return api._get_client()._transport._pool._http2
+        finally:
+            await api.aclose()
+    
+    assert asyncio.run(pool_http2(True)) is True
+    assert asyncio.run(pool_http2(False)) is False
+    print("✅ 连接池按配置启用HTTP/2")
+
+
+def test_http2_responses_pipeline():
+    """测试HTTP/2响应同样经过重试和解析，并统计协商到的协议"""
+    print("\n📡 测试HTTP/2响应处理")
+    print("=" * 50)
+    
+    attempts = {"count": 0}
+    
+    async def handler(request):
+        attempts["count"] += 1
+        if attempts["count"] == 1:
+            return httpx.Response(503, extensions={"http_version": b"HTTP/2"})
+        bvid = request.url.params["bvid"]
+        return httpx.Response(200, json={"code": 0, "data": {"bvid": bvid}}, extensions={"http_version": b"HTTP/2"})
+    
+    api = make_api(handler, http2=True)
+    api.retry_delay_base = 0
+    
+    async def run():
+        try:
+            first = await api._make_request(VIDEO_URL, params={"bvid": "BV1h2test0"})
+            batch = await asyncio.gather(*[api._make_request(VIDEO_URL, params={"bvid": f"BV1h2test{i}"})
+                                           for i in range(1, 6)])
+            return first, batch
+        finally:
+            await api.aclose()
+    
+    first, batch = asyncio.run(run())
+    print(f"   请求{attempts['count']}次, 协议统计: {api.http_versions}")
+    assert first["data"]["bvid"] == "BV1h2test0", "HTTP/2的5xx响应按原逻辑重试"
+    assert [r["data"]["bvid"] for r in batch] == [f"BV1h2test{i}" for i in range(1, 6)]
+    assert api.http_versions == {"HTTP/2": 7}
+    print("✅ HTTP/2响应经过原有重试和解析流程")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试HTTP/2传输...")
+    
+    test_http2_config()
+    test_client_pool_protocol()
+    test_http2_responses_pipeline()
+    
+    print("\n" + "=" * 60)
+    print("🎉 HTTP/2传输测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
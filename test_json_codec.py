@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+测试可插拔的JSON编解码层
+验证orjson与标准库后端的结果一致、回退行为，并在模拟的热门/评论响应上对比解析和序列化耗时
+"""
+
+import sys
+import os
+import json
+import time
+import timeit
+
+sys.path.append(os.path.dirname(__file__))
+
+import httpx
+import main
+from main import JsonCodec, BilibiliAPI, VideoRecord, CommentRecord
+
+
+def popular_payload(page_size: int = 50):
+    """模拟热门视频接口（ps=50）的响应"""
+    videos = [{
+        "aid": 100000 + i, "bvid": f"BV1pop{i:05d}", "title": f"热门视频{i} 🎬", "pic": f"https://i0.hdslb.com/{i}.jpg",
+        "desc": "这是一段比较长的视频简介。" * 20, "duration": 600 + i, "pubdate": 1700000000 + i, "tname": "知识", "tid": 201,
+        "owner": {"mid": 2000 + i, "name": f"UP主{i}", "face": f"https://i0.hdslb.com/face{i}.jpg"},
+        "stat": {"view": 1000000 + i, "like": 50000, "coin": 3000, "favorite": 8000, "share": 900, "reply": 1200, "danmaku": 4000, "his_rank": 0},
+        "rcmd_reason": {"content": "百万播放", "corner_mark": 0},
+    } for i in range(page_size)]
+    return {"code": 0, "message": "0", "ttl": 1, "data": {"list": videos, "no_more": False}}
+
+
+def comment_payload(count: int = 400):
+    """模拟数百KB的评论页响应"""
+    replies = [{
+        "rpid": 5000000 + i, "oid": 170001, "rcount": i % 7, "like": i * 3, "ctime": 1700000000 + i,
+        "content": {"message": f"评论内容{i}，" + "哈哈哈这条评论写得很长。" * 15, "emote": {}},
+        "member": {"mid": str(30000 + i), "uname": f"用户{i}", "avatar": f"https://i0.hdslb.com/a{i}.jpg",
+                   "level_info": {"current_level": i % 7}, "vip": {"vipStatus": i % 2}},
+        "replies": None,
+    } for i in range(count)]
+    return {"code": 0, "message": "0", "data": {"page": {"num": 1, "size": count, "count": 9999}, "replies": replies}}
+
+
+def bench(func, rounds: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def test_backend_parity():
+    """测试两个后端输出一致"""
+    print("⚖️ 测试后端一致性")
+    print("=" * 50)
+    
+    stdlib = JsonCodec("json")
+    fast = JsonCodec("auto")
+    print(f"   当前后端: {fast.name}")
+    
+    payload = popular_payload(5)
+    assert stdlib.name == "json"
+    assert fast.dumps(payload) == stdlib.dumps(payload), "紧凑输出应一致"
+    assert fast.dumps(payload, pretty=True) == stdlib.dumps(payload, pretty=True), "缩进输出应一致"
+    assert fast.dumps_bytes(payload) == stdlib.dumps_bytes(payload)
+    assert fast.loads(stdlib.dumps_bytes(payload)) == payload
+    assert fast.loads(stdlib.dumps(payload)) == payload
+    
+    # 非字符串键和超出64位的整数
+    assert json.loads(fast.dumps({1: "a"})) == {"1": "a"}
+    huge = {"value": 2 ** 70}
+    assert fast.dumps(huge) == stdlib.dumps(huge), "orjson无法处理的值应回退到标准库"
+    
+    # 超出64位的整数和非法UTF-8：两个后端解析结果一致，不丢精度也不报错
+    wide = b'{"n": 123456789012345678901234567890, "list": [-99999999999999999999999]}'
+    for data in (wide, wide.decode("utf-8"), memoryview(wide)):
+        assert fast.loads(data) == stdlib.loads(data) == {"n": 123456789012345678901234567890,
+                                                          "list": [-99999999999999999999999]}
+    
+    # int64/uint64边界：范围内保持整数，超出范围（包括19位的负数）回退到标准库后仍是精确的整数
+    edges = [2 ** 63 - 1, -2 ** 63, -2 ** 63 - 1, 2 ** 64 - 1, 2 ** 64, -10 ** 19]
+    for value in edges:
+        text = f'{{"mid": {value}, "list": [{value}]}}'
+        parsed = fast.loads(text.encode("utf-8"))
+        assert parsed == stdlib.loads(text) == {"mid": value, "list": [value]}, f"{value}解析结果应与标准库一致"
+        assert type(parsed["mid"]) is int, f"{value}不应变成float"
+    assert fast.loads(b'[1e19, -1e300, 1.5]') == [1e19, -1e300, 1.5], "本来就是float的值不受影响"
+    
+    invalid = b'{"title": "\xff\xfe\xe4\xb8", "code": 0}'
+    assert fast.loads(invalid) == stdlib.loads(memoryview(invalid)) == {"title": "\ufffd\ufffd\ufffd", "code": 0}
+    
+    try:
+        fast.loads("{bad")
+        assert False, "非法JSON应抛出异常"
+    except json.JSONDecodeError:
+        pass
+    print("✅ 两个后端输出一致，异常类型兼容")
+
+
+def test_parse_response_uses_codec():
+    """测试响应解析走编解码层并保留反爬前缀处理"""
+    print("\n🧩 测试响应解析")
+    print("=" * 50)
+    
+    api = BilibiliAPI()
+    body = json.dumps(popular_payload(3), ensure_ascii=False)
+    for prefix in ("", "!"):
+        response = httpx.Response(200, headers={"content-type": "application/json"}, content=(prefix + body).encode("utf-8"))
+        result = api._parse_response(response)
+        assert result["code"] == 0 and len(result["data"]["list"]) == 3
+    
+    # 非法UTF-8不应被当作非JSON内容（否则会被误判为限流）
+    invalid = httpx.Response(200, headers={"content-type": "application/json"},
+                             content=b'{"code": 0, "data": {"title": "\xff\xfe"}}')
+    result = api._parse_response(invalid)
+    assert result["code"] == 0 and not api._is_throttled(result)
+    
+    broken = httpx.Response(200, headers={"content-type": "application/json"}, content=b"{broken")
+    result = api._parse_response(broken)
+    assert "parse_error" in result, "解析失败应返回parse_error"
+    
+    cache = main.ResponseCache()
+    payload = comment_payload(3)
+    assert cache.set("k", "https://api.bilibili.com/x/v2/reply", payload)
+    assert cache.get("k") == payload, "缓存读写应经过编解码层往返一致"
+    print("✅ 响应解析和缓存读写正常")
+
+
+def test_benchmark():
+    """对比两个后端在模拟响应上的解析和序列化耗时"""
+    print("\n⏱️ 编解码耗时对比")
+    print("=" * 50)
+    
+    stdlib = JsonCodec("json")
+    fast = JsonCodec("auto")
+    payloads = {"popular ps=50": popular_payload(50), "评论页": comment_payload(400)}
+    
+    for label, payload in payloads.items():
+        raw = stdlib.dumps(payload)
+        raw_bytes = raw.encode("utf-8")
+        formatted = {"list": [VideoRecord(v).to_dict("trending") for v in payload["data"]["list"]]} \
+            if "list" in payload["data"] else {"replies": [CommentRecord(r).to_dict("detail") for r in payload["data"]["replies"]]}
+        print(f"   {label}: 响应{len(raw.encode('utf-8')) / 1024:.0f}KB")
+        for name, codec in (("json", stdlib), (fast.name, fast)):
+            decode = bench(lambda: codec.loads(raw))
+            encode = bench(lambda: codec.dumps(formatted))
+            print(f"      {name:>6}: 解析 {decode:.2f}ms, 输出 {encode:.2f}ms")
+        
+        # 响应正文是bytes：auto后端的解析（含超范围整数检查）不应比标准库慢；
+        # timeit计时期间关闭垃圾回收，两个后端交替测量并取最好成绩，减少其他测试留下的对象和系统负载造成的抖动
+        stdlib_decode = fast_decode = float("inf")
+        for _ in range(7):
+            stdlib_decode = min(stdlib_decode, timeit.timeit(lambda: stdlib.loads(raw_bytes), number=10) * 100)
+            fast_decode = min(fast_decode, timeit.timeit(lambda: fast.loads(raw_bytes), number=10) * 100)
+        print(f"      bytes解析: json {stdlib_decode:.2f}ms, {fast.name} {fast_decode:.2f}ms")
+        assert fast_decode <= stdlib_decode * 1.05, "auto后端解析不应比标准库慢"
+    
+    if fast.name == "json":
+        print("   ℹ️ 未安装orjson，两个后端相同")
+    print("✅ 耗时对比完成")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试JSON编解码层...")
+    
+    test_backend_parity()
+    test_parse_response_uses_codec()
+    test_benchmark()
+    
+    print("\n" + "=" * 60)
+    print("🎉 JSON编解码层测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+测试工具结果的输出格式
+验证pretty/compact/ndjson/table四种格式的内容和体积，以及工具的逐次覆盖参数
+"""
+
+import json
+import sys
+import os
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+import main
+from main import AsyncBilibiliAPI, RateLimiter, format_output, measure_output_sizes
+
+
+def sample_videos(count: int = 20):
+    """构造热门列表样例"""
+    return [{
+        "bvid": f"BV1sample{i:04d}", "aid": 1000 + i, "title": f"样例视频\t{i}", "duration": 300 + i,
+        "pubdate": 1700000000 + i, "tname": "科技", "desc": "这是一段视频简介" * 3,
+        "owner": {"mid": 2000 + i, "name": f"UP主{i}"},
+        "stat": {"view": 100000 + i, "like": 5000, "coin": 300, "favorite": 800, "reply": 120, "share": 40, "danmaku": 60},
+    } for i in range(count)]
+
+
+def test_format_sizes():
+    """测试各格式的体积：紧凑格式明显小于缩进格式"""
+    print("📦 测试输出体积")
+    print("=" * 50)
+    
+    result = {"code": 0, "message": "success", "data": {"count": 20, "list": sample_videos()}}
+    sizes = measure_output_sizes(result)
+    for fmt, size in sizes.items():
+        print(f"   {fmt:8s} {size:6d} 字节 ({size / sizes['pretty'] * 100:.0f}%)")
+    
+    assert sizes["compact"] < sizes["pretty"] * 0.75, "紧凑JSON应比缩进JSON小25%以上"
+    assert sizes["table"] < sizes["compact"]
+    print("✅ 紧凑格式和表格格式显著缩小输出")
+
+
+def test_ndjson_and_table():
+    """测试NDJSON和表格格式的结构"""
+    print("\n📄 测试NDJSON和表格")
+    print("=" * 50)
+    
+    result = {"code": 0, "message": "success", "data": {"count": 3, "list": sample_videos(3)}}
+    
+    ndjson_lines = format_output(result, "ndjson").split("\n")
+    meta = json.loads(ndjson_lines[0][2:])
+    assert meta["data"] == {"count": 3}
+    assert [json.loads(line)["bvid"] for line in ndjson_lines[1:]] == [v["bvid"] for v in sample_videos(3)]
+    
+    table_lines = format_output(result, "table").split("\n")
+    header = table_lines[1].split("\t")
+    first = dict(zip(header, table_lines[2].split("\t")))
+    print(f"📊 表头: {header[:6]}...")
+    assert len(table_lines) == 5
+    assert first["stat.view"] == "100000" and first["owner.name"] == "UP主0"
+    assert first["title"] == "样例视频 0", "单元格中的制表符应被替换"
+    
+    # 没有记录列表的结果退回紧凑JSON
+    assert format_output({"code": 0, "data": {"view": 1}}, "table") == '{"code":0,"data":{"view":1}}'
+    print("✅ NDJSON逐行输出记录，表格按点号路径展开嵌套字段")
+
+
+def test_tool_override():
+    """测试工具默认使用紧凑格式，并支持逐次覆盖"""
+    print("\n🛠️ 测试工具输出格式参数")
+    print("=" * 50)
+    
+    async def handler(request):
+        return httpx.Response(200, json={"code": 0, "data": {"list": sample_videos(5)}})
+    
+    original = main.bili_api_async
+    main.bili_api_async = AsyncBilibiliAPI(cookies={}, rate_limiter=RateLimiter({"popular": (0.0, 1)}, jitter=0),
+                                           transport=httpx.MockTransport(handler))
+    try:
+        default = main.get_trending_videos(limit=5)
+        pretty = main.get_trending_videos(limit=5, output_format="pretty")
+        table = main.get_trending_videos(limit=5, output_format="table")
+    finally:
+        main.bili_api_async = original
+    
+    print(f"📏 默认: {len(default)}字符, pretty: {len(pretty)}字符, table: {len(table)}字符")
+    assert main.DEFAULT_OUTPUT_FORMAT == "compact" or os.environ.get("BILIBILI_OUTPUT_FORMAT")
+    assert json.loads(default) == json.loads(pretty)
+    assert "\n" in pretty and len(default) < len(pretty)
+    assert len(table.split("\n")) == 7
+    print("✅ 默认紧凑输出，output_format参数可逐次覆盖")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试输出格式...")
+    
+    test_format_sizes()
+    test_ndjson_and_table()
+    test_tool_override()
+    
+    print("\n" + "=" * 60)
+    print("🎉 输出格式测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
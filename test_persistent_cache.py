@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+测试SQLite持久化缓存
+模拟服务器重启，验证视频元数据和导航信息（WBI密钥）在重启后仍可命中
+"""
+
+import json
+import sys
+import os
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+from main import ResponseCache, SQLiteCacheStore
+
+VIEW_URL = "https://api.bilibili.com/x/web-interface/view"
+NAV_URL = "https://api.bilibili.com/x/web-interface/nav"
+POPULAR_URL = "https://api.bilibili.com/x/web-interface/popular"
+
+
+def test_survives_restart():
+    """测试缓存在“重启”（重新创建实例）后仍然可用"""
+    print("💾 测试重启后缓存可用")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        view_key = ResponseCache.make_key(VIEW_URL, {"bvid": "BV1disk00001"})
+        
+        # 第一次“会话”
+        store = SQLiteCacheStore(path)
+        cache = ResponseCache(store=store)
+        cache.set(view_key, VIEW_URL, {"code": 0, "data": {"title": "持久化测试" * 50}})
+        cache.set(NAV_URL, NAV_URL, {"code": 0, "data": {"wbi_img": {"img_url": "a.png", "sub_url": "b.png"}}})
+        cache.set(POPULAR_URL, POPULAR_URL, {"code": 0, "data": {"list": []}})
+        print(f"📊 第一次会话写入后: {store.stats()}")
+        stored_families = {row[0] for row in store._conn.execute("SELECT family FROM responses")}
+        store.close()
+        
+        # 第二次“会话”：全新的内存缓存
+        store = SQLiteCacheStore(path)
+        cache = ResponseCache(store=store)
+        view = cache.get(view_key)
+        nav = cache.get(NAV_URL)
+        popular = cache.get(POPULAR_URL)
+        print(f"📊 第二次会话统计: {cache.stats()}")
+        store.close()
+    
+    assert view["data"]["title"].startswith("持久化测试")
+    assert stored_families == {"view"}, "导航信息含登录账号资料，不写入磁盘"
+    assert nav is None, "导航信息不持久化"
+    assert popular is None, "popular列表不应持久化"
+    print("✅ 视频元数据在重启后命中，导航信息和热门列表不持久化")
+
+
+def test_purges_legacy_nav_entries():
+    """测试旧版本写入磁盘的导航信息在启动时被清理，且不会被读回"""
+    print("\n🔏 测试清理磁盘上的导航信息")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        store = SQLiteCacheStore(path)
+        blob = json.dumps({"code": 0, "data": {"isLogin": True, "uname": "账号昵称", "money": 12}}).encode("utf-8")
+        store.set(NAV_URL, "nav", time.time() + 3600, blob)
+        store.close()
+        
+        store = SQLiteCacheStore(path)
+        cache = ResponseCache(store=store)
+        remaining = store._conn.execute("SELECT COUNT(*) FROM responses WHERE family = 'nav'").fetchone()[0]
+        nav = cache.get(NAV_URL)
+        store.close()
+    
+    print(f"📊 清理后剩余导航条目: {remaining}")
+    assert remaining == 0 and nav is None
+    print("✅ 账号资料不再留在磁盘上")
+
+
+def test_blobs_are_compressed():
+    """测试磁盘上保存的是压缩数据"""
+    print("\n🗜️ 测试压缩存储")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteCacheStore(os.path.join(tmp, "cache.sqlite3"))
+        raw = ("重复的视频简介内容" * 500).encode("utf-8")
+        store.set("k", "view", time.time() + 60, raw)
+        stats = store.stats()
+        store.close()
+    
+    print(f"📦 原始 {len(raw)} 字节 -> 压缩后 {stats['bytes']} 字节")
+    assert stats["bytes"] < len(raw) / 10
+    print("✅ 数据以压缩形式保存")
+
+
+def test_prune_expired_and_size_bound():
+    """测试过期清理和容量上限"""
+    print("\n🧹 测试过期清理和容量上限")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLiteCacheStore(os.path.join(tmp, "cache.sqlite3"), max_bytes=4096)
+        store.set("expired", "view", time.time() - 1, b"{}")
+        assert store.get("expired") is None
+        
+        for i in range(50):
+            store.set(f"key{i}", "view", time.time() + 60, os.urandom(512))
+        removed = store.prune()
+        stats = store.stats()
+        recent = store.get("key49")
+        store.close()
+    
+    print(f"🗑️ 清理条目数: {removed}, 剩余: {stats}")
+    assert stats["bytes"] <= 4096
+    assert recent is not None, "最近写入的条目应保留"
+    print("✅ 过期条目被清理，总大小受限")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 开始测试持久化缓存...")
+    
+    test_survives_restart()
+    test_purges_legacy_nav_entries()
+    test_blobs_are_compressed()
+    test_prune_expired_and_size_bound()
+    
+    print("\n" + "=" * 60)
+    print("🎉 持久化缓存测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
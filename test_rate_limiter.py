@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+测试按端点族划分的令牌桶限速器
+验证轻量接口不再承担搜索接口的等待惩罚
+"""
+
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(__file__))
+
+from main import RateLimiter, TokenBucket, get_endpoint_family
+
+
+def test_endpoint_families():
+    """测试URL到端点族的映射"""
+    print("🗂️ 测试端点族划分")
+    print("=" * 50)
+    
+    cases = {
+        "https://api.bilibili.com/x/web-interface/view": "view",
+        "https://api.bilibili.com/x/space/wbi/acc/info": "space",
+        "https://api.bilibili.com/x/web-interface/wbi/search/type": "search",
+        "https://api.bilibili.com/x/web-interface/search/type": "search",
+        "https://s.search.bilibili.com/main/suggest": "search",
+        "https://api.bilibili.com/x/v2/reply/reply": "reply",
+        "https://api.bilibili.com/x/web-interface/popular": "popular",
+        "https://api.bilibili.com/x/web-interface/ranking/v2": "popular",
+        "https://api.bilibili.com/x/web-interface/nav": "nav",
+        "https://api.bilibili.com/x/relation/stat": "relation",
+        "https://api.bilibili.com/x/unknown": "default",
+    }
+    
+    for url, expected in cases.items():
+        family = get_endpoint_family(url)
+        print(f"  {'✅' if family == expected else '❌'} {url} -> {family}")
+        assert family == expected
+
+
+def test_token_bucket_reservation():
+    """测试令牌桶的突发容量和预约排队"""
+    print("\n🪣 测试令牌桶预约")
+    print("=" * 50)
+    
+    bucket = TokenBucket(rate=2.0, burst=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    print(f"📊 连续4次预约的等待时间: {[round(w, 2) for w in waits]}")
+    
+    assert waits[0] == 0 and waits[1] == 0, "突发容量内应立即放行"
+    assert 0.4 < waits[2] <= 0.5 and 0.9 < waits[3] <= 1.0, "超出容量后应按速率排队"
+    print("✅ 突发容量内立即放行，超出后按速率排队")
+
+
+def test_buckets_are_independent():
+    """测试不同端点族互不影响"""
+    print("\n🔀 测试端点族相互独立")
+    print("=" * 50)
+    
+    limiter = RateLimiter(jitter=0)
+    search_url = "https://api.bilibili.com/x/web-interface/wbi/search/type"
+    relation_url = "https://api.bilibili.com/x/relation/stat"
+    
+    limiter.reserve(search_url)
+    search_wait = limiter.reserve(search_url)
+    relation_waits = [limiter.reserve(relation_url) for _ in range(3)]
+    
+    print(f"🔍 第二次搜索需要等待: {search_wait:.2f}秒")
+    print(f"👥 关系统计等待: {relation_waits}")
+    assert search_wait > 4.0
+    assert all(w == 0 for w in relation_waits), "关系统计接口不应承担搜索接口的等待"
+    print("✅ 轻量接口不受搜索限速影响")
+
+
+def test_mixed_workload_throughput():
+    """对比混合负载下旧的全局5-10秒间隔和令牌桶的总等待时间"""
+    print("\n📈 测试混合负载吞吐")
+    print("=" * 50)
+    
+    workload = (
+        ["https://api.bilibili.com/x/web-interface/view"] * 8
+        + ["https://api.bilibili.com/x/relation/stat"] * 8
+        + ["https://api.bilibili.com/x/web-interface/popular"] * 2
+        + ["https://api.bilibili.com/x/web-interface/wbi/search/type"] * 2
+    )
+    
+    # 旧实现：每个请求之间平均7.5秒
+    legacy_total = 7.5 * (len(workload) - 1)
+    
+    limiter = RateLimiter(jitter=0)
+    start = time.monotonic()
+    # 并发场景下，总耗时取决于排队最久的那个请求
+    token_bucket_total = max(limiter.reserve(url) for url in workload)
+    elapsed = time.monotonic() - start
+    
+    print(f"⏱️ 旧实现预计耗时: {legacy_total:.1f}秒")
+    print(f"⏱️ 令牌桶预计耗时: {token_bucket_total:.1f}秒 (计算耗时{elapsed * 1000:.2f}ms)")
+    assert token_bucket_total * 10 <= legacy_total
+    print(f"✅ 吞吐提升约 {legacy_total / max(token_bucket_total, 0.1):.0f} 倍")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 开始测试端点族限速器...")
+    
+    test_endpoint_families()
+    test_token_bucket_reservation()
+    test_buckets_are_independent()
+    test_mixed_workload_throughput()
+    
+    print("\n" + "=" * 60)
+    print("🎉 限速器测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+测试统一的记录模型
+验证__slots__记录、按需计算的格式化字段、各视图的输出结构，以及与旧的逐字段字典构建相比的内存占用
+"""
+
+import sys
+import os
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(__file__))
+
+from main import VideoRecord, CommentRecord, UserRecord, compile_fields
+
+
+def sample_video(i: int = 0):
+    return {
+        "bvid": f"BV1record{i:04d}", "aid": 1000 + i, "title": f"记录测试{i}", "desc": "简介" * 200,
+        "duration": 3725, "pubdate": 1700000000, "tname": "科技", "tid": 36,
+        "owner": {"mid": 2, "name": "碧诗", "face": "f.jpg"},
+        "stat": {"vv": 1234567, "like": 98765, "coin": 3456, "favorite": 4567, "share": 789, "reply": 123, "danmaku": 890},
+        "rcmd_reason": {"content": "百万播放"},
+    }
+
+
+def legacy_trending_view(video):
+    """旧实现：每条记录都构建全部格式化字段"""
+    stat_data = video.get("stat", {})
+    owner_data = video.get("owner", {})
+    view_count = stat_data.get("view", 0) or stat_data.get("vv", 0)
+    return {
+        "basic_info": {"title": video.get("title", ""), "bvid": video.get("bvid", ""), "desc": video.get("desc", "")[:300]},
+        "author": {"name": owner_data.get("name", ""), "mid": owner_data.get("mid", 0)},
+        "stats": {name: stat_data.get(name, 0) for name in ("like", "coin", "favorite", "reply", "share", "danmaku")}
+        | {f"{name}_formatted": f"{stat_data.get(name, 0):,}" for name in ("like", "coin", "favorite", "reply", "share", "danmaku")}
+        | {"view": view_count, "view_formatted": f"{view_count:,}"},
+    }
+
+
+def test_slots_and_lazy_fields():
+    """测试记录没有实例字典，格式化字段按需计算"""
+    print("🧱 测试记录结构")
+    print("=" * 50)
+    
+    record = VideoRecord(sample_video())
+    assert not hasattr(record, "__dict__"), "记录应使用__slots__"
+    assert record.view == 1234567, "播放量应兼容vv字段"
+    assert record.view_formatted == "1,234,567"
+    assert record.duration_formatted == "62:05"
+    assert record.interaction_rate == f"{round(record.total_interactions / record.view * 100, 2)}%"
+    assert record.rcmd_reason == "百万播放"
+    
+    comment = CommentRecord({"rpid": 1, "rcount": 0, "like": 1200, "content": {"message": "前排"},
+                             "member": {"uname": "路人", "mid": 3, "level_info": {"current_level": 4}}})
+    assert comment.reply_count_formatted == "无回复" and comment.like_formatted == "1,200"
+    assert comment.level == 4 and comment.message_length == 2
+    print("✅ 记录使用__slots__，格式化字段在访问时计算")
+
+
+def test_views():
+    """测试各工具视图的结构"""
+    print("\n🗂️ 测试视图")
+    print("=" * 50)
+    
+    video = VideoRecord(sample_video())
+    trending = video.to_dict("trending")
+    assert list(trending) == ["basic_info", "time_info", "category", "author", "stats", "ranking_info", "additional_info"]
+    assert trending["basic_info"]["desc"].endswith("...") and len(trending["basic_info"]["desc"]) == 303
+    assert trending["ranking_info"]["rcmd_reason"] == "百万播放"
+    assert video.to_dict("brief")["duration"] == "62:05"
+    assert video.to_dict("search")["author"] == "碧诗"
+    
+    user = UserRecord.from_search({"mid": 2, "uname": "碧诗", "usign": "签名" * 60, "upic": "u.jpg", "videos": 5})
+    assert user.to_dict("search") == {"mid": 2, "uname": "碧诗", "usign": "签名" * 50 + "...", "fans": 0,
+                                      "videos": 5, "upic": "u.jpg", "level": 0}
+    
+    card = UserRecord.from_card({"card": {"mid": "7", "name": "名片", "attention": 3}, "follower": 9})
+    profile = card.to_dict("profile_with_relation")
+    assert profile["mid"] == 7 and profile["following"] == 3 and profile["follower"] == 9
+    assert "follower" not in card.to_dict("profile")
+    for mid in ("", None, "abc"):
+        broken = UserRecord.from_card({"card": {"mid": mid, "name": "异常名片"}})
+        assert broken.mid == 0 and broken.profile_url == "", "mid无法转换时不抛出异常"
+    print("✅ 视图结构与工具输出一致")
+
+
+def test_memory_and_speed():
+    """测试大列表下记录视图与旧实现的内存占用和耗时"""
+    print("\n📉 测试内存和耗时")
+    print("=" * 50)
+    
+    videos = [sample_video(i) for i in range(2000)]
+    extract = compile_fields("video", "title,bvid,stats.view,author.name")
+    
+    def measure(build):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = build()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, peak, elapsed
+    
+    _, legacy_peak, legacy_time = measure(lambda: [legacy_trending_view(v) for v in videos])
+    records, record_peak, record_time = measure(lambda: [VideoRecord(v) for v in videos])
+    _, projected_peak, projected_time = measure(lambda: [extract(r) for r in records])
+    
+    print(f"   旧实现逐字段字典: {legacy_peak / 1024:.0f}KB, {legacy_time * 1000:.1f}ms")
+    print(f"   记录对象:         {record_peak / 1024:.0f}KB, {record_time * 1000:.1f}ms")
+    print(f"   记录+字段投影:    {projected_peak / 1024:.0f}KB, {projected_time * 1000:.1f}ms")
+    assert record_peak < legacy_peak, "记录对象应比逐字段构建的字典占用更少内存"
+    assert projected_peak < legacy_peak
+    print("✅ 记录对象和字段投影减少了内存占用")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 开始测试记录模型...")
+    
+    test_slots_and_lazy_fields()
+    test_views()
+    test_memory_and_speed()
+    
+    print("\n" + "=" * 60)
+    print("🎉 记录模型测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+测试响应缓存（按端点族TTL、LRU淘汰、字节上限、命中统计）
+"""
+
+import asyncio
+import sys
+import os
+import time
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+from main import AsyncBilibiliAPI, RateLimiter, ResponseCache
+
+VIEW_URL = "https://api.bilibili.com/x/web-interface/view"
+
+
+def make_counting_api():
+    """创建统计上游请求次数的测试实例"""
+    calls = []
+    
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(str(request.url))
+        bvid = request.url.params.get("bvid", "")
+        return httpx.Response(200, json={
+            "code": 0,
+            "data": {"bvid": bvid, "aid": 42, "title": "缓存测试", "stat": {"view": 1, "like": 2}}
+        })
+    
+    api = AsyncBilibiliAPI(
+        cookies={},
+        rate_limiter=RateLimiter({"view": (0, 1)}, jitter=0),
+        cache=ResponseCache(),
+        transport=httpx.MockTransport(handler),
+    )
+    return api, calls
+
+
+def test_cache_key_ignores_volatile_params():
+    """测试缓存键忽略ts、w_rid、wts等易变参数"""
+    print("🔑 测试缓存键规范化")
+    print("=" * 50)
+    
+    key_a = ResponseCache.make_key(VIEW_URL, {"bvid": "BV1x", "ts": 1, "w_rid": "a"})
+    key_b = ResponseCache.make_key(VIEW_URL, {"w_rid": "b", "bvid": "BV1x", "ts": 2, "wts": 3})
+    print(f"  {key_a}")
+    assert key_a == key_b
+    print("✅ 易变参数不影响缓存键")
+
+
+def test_repeated_lookup_hits_cache():
+    """测试重复查询命中缓存，视频统计复用视频信息"""
+    print("\n🗃️ 测试重复查询命中缓存")
+    print("=" * 50)
+    
+    async def run():
+        api, calls = make_counting_api()
+        await api.get_video_info("BV1cache0001")
+        start = time.perf_counter()
+        stat = await api.get_video_stat("BV1cache0001")
+        elapsed = time.perf_counter() - start
+        await api.aclose()
+        return api, calls, stat, elapsed
+    
+    api, calls, stat, elapsed = asyncio.run(run())
+    print(f"📡 上游请求次数: {len(calls)}")
+    print(f"⚡ 缓存命中耗时: {elapsed * 1e6:.0f}微秒")
+    print(f"📊 缓存统计: {api.cache.stats()}")
+    assert len(calls) == 1
+    assert stat["data"]["aid"] == 42
+    print("✅ get_video_stat复用了get_video_info的缓存")
+
+
+def test_cached_result_is_isolated():
+    """测试调用方修改返回结果不会污染缓存"""
+    print("\n🧪 测试缓存结果隔离")
+    print("=" * 50)
+    
+    cache = ResponseCache()
+    key = cache.make_key(VIEW_URL, {"bvid": "BV1iso"})
+    cache.set(key, VIEW_URL, {"code": 0, "data": {"list": [1, 2, 3]}})
+    first = cache.get(key)
+    first["data"]["list"] = []
+    assert cache.get(key)["data"]["list"] == [1, 2, 3]
+    print("✅ 缓存返回的是独立副本")
+
+
+def test_ttl_lru_and_byte_cap():
+    """测试TTL过期、LRU淘汰和字节上限"""
+    print("\n♻️ 测试TTL、LRU和字节上限")
+    print("=" * 50)
+    
+    # TTL过期
+    cache = ResponseCache(ttls={"popular": 0.05})
+    url = "https://api.bilibili.com/x/web-interface/popular"
+    cache.set(url, url, {"code": 0, "data": {}})
+    time.sleep(0.1)
+    assert cache.get(url) is None and cache.expirations == 1
+    print("✅ popular缓存按TTL过期")
+    
+    # 失败响应不缓存
+    assert not cache.set(VIEW_URL, VIEW_URL, {"code": -412, "message": "请求被拦截"})
+    print("✅ 失败响应不缓存")
+    
+    # LRU淘汰
+    cache = ResponseCache(max_entries=2)
+    for bvid in ("a", "b"):
+        cache.set(bvid, VIEW_URL, {"code": 0, "data": bvid})
+    cache.get("a")  # a变为最近使用
+    cache.set("c", VIEW_URL, {"code": 0, "data": "c"})
+    assert cache.get("b") is None and cache.get("a") is not None
+    print("✅ 淘汰最久未使用的条目")
+    
+    # 字节上限
+    cache = ResponseCache(max_bytes=200)
+    for i in range(10):
+        cache.set(str(i), VIEW_URL, {"code": 0, "data": "x" * 50})
+    stats = cache.stats()
+    print(f"📊 字节上限200时的统计: {stats}")
+    assert stats["bytes"] <= 200 and stats["evictions"] > 0
+    print("✅ 总字节数不超过上限")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 开始测试响应缓存...")
+    
+    test_cache_key_ignores_volatile_params()
+    test_repeated_lookup_hits_cache()
+    test_cached_result_is_isolated()
+    test_ttl_lru_and_byte_cap()
+    
+    print("\n" + "=" * 60)
+    print("🎉 响应缓存测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
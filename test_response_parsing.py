@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+测试字节级响应解析
+验证反爬前缀、BOM、HTML页面的识别，以及大响应解析时的峰值内存
+"""
+
+import sys
+import os
+import json
+import time
+import tracemalloc
+
+sys.path.append(os.path.dirname(__file__))
+
+import httpx
+from main import BilibiliAPI, json_codec
+
+JSON_HEADERS = {"content-type": "application/json; charset=utf-8"}
+
+
+def make_response(body: bytes, headers=None, status: int = 200):
+    return httpx.Response(status, headers=headers or JSON_HEADERS, content=body)
+
+
+def test_prefixes():
+    """测试反爬前缀和空白/BOM处理"""
+    print("🛡️ 测试反爬前缀")
+    print("=" * 50)
+    
+    api = BilibiliAPI()
+    body = json.dumps({"code": 0, "data": {"title": "前缀测试"}}, ensure_ascii=False).encode("utf-8")
+    for prefix in ("", "!", "!［", "］", "  \n", "﻿"):
+        result = api._parse_response(make_response(prefix.encode("utf-8") + body + b"\n"))
+        assert result == {"code": 0, "data": {"title": "前缀测试"}}, f"前缀{prefix!r}解析失败: {result}"
+        print(f"   前缀{prefix!r}: ✅")
+    
+    # 感叹号后不是JSON时不去掉前缀，按JSON内容类型解析失败
+    result = api._parse_response(make_response(b'!"text"'))
+    assert "parse_error" in result and result["html_content"] == '!"text"'
+    print("✅ 反爬前缀处理正常")
+
+
+def test_non_json_bodies():
+    """测试空响应、HTML页面和其他文本"""
+    print("\n📄 测试非JSON响应")
+    print("=" * 50)
+    
+    api = BilibiliAPI()
+    html = {"content-type": "text/html"}
+    assert api._parse_response(make_response(b"  \r\n"))["error"] == "空响应"
+    assert api._parse_response(make_response(b"<html>403 Forbidden</html>", html))["status_code"] == 403
+    assert api._parse_response(make_response(b"<!DOCTYPE html><p>Not Found</p>", html))["status_code"] == 404
+    
+    page = "<!DOCTYPE html>" + "页面" * 2000
+    result = api._parse_response(make_response(page.encode("utf-8"), html))
+    assert result["html_content"] == page[:500], "HTML只保留开头500个字符"
+    
+    result = api._parse_response(make_response("纯文本内容".encode("utf-8"), {"content-type": "text/plain"}))
+    assert result["html_content"] == "纯文本内容"
+    assert api._parse_response(make_response(b"{}", status=412))["status_code"] == 412
+    print("✅ 非JSON响应处理正常")
+
+
+def legacy_parse(response):
+    """旧实现：解码全文、strip、切片后再解析"""
+    response_text = response.text.strip()
+    preview = response_text[:50]
+    original_text = response_text
+    if response_text.startswith('!'):
+        response_text = response_text[1:]
+    if not response_text.strip().startswith(('{', '[')):
+        response_text = original_text
+    return json_codec.loads(response_text), preview
+
+
+def test_large_body_memory():
+    """测试大响应解析的峰值内存和耗时"""
+    print("\n📉 测试大响应解析")
+    print("=" * 50)
+    
+    api = BilibiliAPI()
+    replies = [{"rpid": i, "content": {"message": "这是一条很长的评论。" * 20}, "member": {"uname": f"用户{i}"}} for i in range(2000)]
+    body = b"!" + json.dumps({"code": 0, "data": {"replies": replies}}, ensure_ascii=False).encode("utf-8")
+    print(f"   响应大小: {len(body) / 1024:.0f}KB, JSON后端: {json_codec.name}")
+    
+    def measure(parse):
+        response = make_response(body)
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = parse(response)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, peak, elapsed
+    
+    (legacy, _), legacy_peak, legacy_time = measure(legacy_parse)
+    result, peak, elapsed = measure(api._parse_response)
+    assert result == legacy, "解析结果应与旧实现一致"
+    
+    print(f"   旧实现(文本): 峰值{legacy_peak / 1024:.0f}KB, {legacy_time * 1000:.1f}ms")
+    print(f"   字节级解析:   峰值{peak / 1024:.0f}KB, {elapsed * 1000:.1f}ms")
+    assert peak < legacy_peak, "字节级解析的峰值内存应更低"
+    print("✅ 字节级解析减少了文本拷贝")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 开始测试字节级响应解析...")
+    
+    test_prefixes()
+    test_non_json_bodies()
+    test_large_body_memory()
+    
+    print("\n" + "=" * 60)
+    print("🎉 字节级响应解析测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+测试相同请求的并发合并（single-flight）
+验证多个工具同时请求同一资源时只发出一次上游请求
+"""
+
+import asyncio
+import sys
+import os
+import threading
+import time
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+from main import AsyncBilibiliAPI, AsyncSingleFlight, RateLimiter, ResponseCache, SingleFlight
+
+NAV_RESPONSE = {
+    "code": 0,
+    "data": {
+        "wbi_img": {
+            "img_url": "https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png",
+            "sub_url": "https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png",
+        }
+    },
+}
+
+
+def make_api(calls):
+    """创建记录上游请求路径的测试实例"""
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request.url.path)
+        await asyncio.sleep(0.1)
+        if request.url.path.endswith("/nav"):
+            return httpx.Response(200, json=NAV_RESPONSE)
+        if request.url.path.endswith("/acc/info"):
+            return httpx.Response(200, json={"code": 0, "data": {"mid": int(request.url.params["mid"])}})
+        return httpx.Response(200, json={
+            "code": 0,
+            "data": {"bvid": request.url.params.get("bvid"), "aid": 7, "title": "合并测试", "stat": {"view": 10}}
+        })
+    
+    return AsyncBilibiliAPI(
+        cookies={},
+        rate_limiter=RateLimiter({family: (0, 1) for family in ("view", "nav", "space")}, jitter=0),
+        cache=ResponseCache(),
+        transport=httpx.MockTransport(handler),
+    )
+
+
+def test_concurrent_view_requests_coalesce():
+    """测试get_video_info和get_video_stat并发请求同一视频"""
+    print("🔗 测试视频信息请求合并")
+    print("=" * 50)
+    
+    async def run():
+        calls = []
+        api = make_api(calls)
+        info, stat, info_again = await asyncio.gather(
+            api.get_video_info("BV1sf0000001"),
+            api.get_video_stat("BV1sf0000001"),
+            api.get_video_info("BV1sf0000001"),
+        )
+        await api.aclose()
+        return api, calls, info, stat, info_again
+    
+    api, calls, info, stat, info_again = asyncio.run(run())
+    print(f"📡 上游请求: {calls}")
+    print(f"🔀 被合并的调用: {api._inflight.shared}")
+    assert calls.count("/x/web-interface/view") == 1
+    assert info["data"]["aid"] == stat["data"]["aid"] == info_again["data"]["aid"] == 7
+    assert info is not info_again, "合并后的结果应互相独立"
+    print("✅ 三个并发调用只发出一次上游请求")
+
+
+def test_concurrent_wbi_refresh_coalesce():
+    """测试多个WBI签名请求同时触发密钥更新"""
+    print("\n🔐 测试WBI密钥更新合并")
+    print("=" * 50)
+    
+    async def run():
+        calls = []
+        api = make_api(calls)
+        await asyncio.gather(*(api.get_user_info(str(uid)) for uid in (1, 2, 3)))
+        await api.aclose()
+        return calls
+    
+    calls = asyncio.run(run())
+    print(f"📡 上游请求: {calls}")
+    assert calls.count("/x/web-interface/nav") == 1
+    print("✅ 并发的WBI密钥更新只请求一次导航接口")
+
+
+def test_sync_single_flight():
+    """测试同步版本的请求合并"""
+    print("\n🧵 测试多线程请求合并")
+    print("=" * 50)
+    
+    flight = SingleFlight()
+    executions = []
+    
+    def slow_fetch():
+        executions.append(1)
+        time.sleep(0.1)
+        return {"code": 0, "data": {"value": 1}}
+    
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", slow_fetch))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    print(f"📊 执行次数: {len(executions)}, 合并次数: {flight.shared}")
+    assert len(executions) == 1 and len(results) == 5
+    assert all(r["data"]["value"] == 1 for r in results)
+    print("✅ 5个线程只执行一次上游请求")
+
+
+def test_leader_mutation_not_shared():
+    """测试发起请求的调用方原地修改结果不影响等待者拿到的结果"""
+    print("\n🧊 测试结果快照")
+    print("=" * 50)
+    
+    def fresh():
+        return {"code": 0, "data": {"list": [1, 2, 3, 4]}}
+    
+    def mutate(result):
+        result["data"]["list"] = result["data"]["list"][:2]
+        result["data"]["search_keyword"] = "leader"
+        return result
+    
+    async def run():
+        flight = AsyncSingleFlight()
+        
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return fresh()
+        
+        async def leader():
+            return mutate(await flight.do("key", fetch))
+        
+        async def follower():
+            await asyncio.sleep(0.01)
+            return await flight.do("key", fetch)
+        
+        return await asyncio.gather(leader(), follower())
+    
+    led, followed = asyncio.run(run())
+    print(f"   异步: 发起方 {led['data']}, 等待者 {followed['data']}")
+    assert followed == fresh(), "等待者不应看到发起方的修改"
+    
+    flight = SingleFlight()
+    joined = threading.Event()
+    
+    def slow_fetch():
+        joined.wait(1)
+        time.sleep(0.05)
+        return fresh()
+    
+    results = {}
+    
+    def follow():
+        time.sleep(0.02)
+        joined.set()
+        results["follower"] = flight.do("key", slow_fetch)
+    
+    thread = threading.Thread(target=follow)
+    thread.start()
+    results["leader"] = mutate(flight.do("key", slow_fetch))
+    thread.join()
+    print(f"   同步: 发起方 {results['leader']['data']}, 等待者 {results['follower']['data']}")
+    assert results["follower"] == fresh() and flight.shared == 1
+    print("✅ 等待者拿到的是唤醒前保存的快照")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 开始测试请求合并...")
+    
+    test_concurrent_view_requests_coalesce()
+    test_concurrent_wbi_refresh_coalesce()
+    test_sync_single_flight()
+    test_leader_mutation_not_shared()
+    
+    print("\n" + "=" * 60)
+    print("🎉 请求合并测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+测试启动预热
+验证预热建立各API主机的连接并准备好WBI密钥、首个签名请求不再请求导航接口，
+以及预热在stdio握手期间并发执行、服务器退出时被取消
+"""
+
+import asyncio
+import sys
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+import main
+from main import AsyncBilibiliAPI, RateLimiter, ResponseCache, WbiSigner, CookiePool, CookieProfile, ProxyPool
+
+NAV = {"code": 0, "data": {"isLogin": False, "wbi_img": {
+    "img_url": "https://i0.hdslb.com/bfs/wbi/7cd084941338484aae1ad9425b84077c.png",
+    "sub_url": "https://i0.hdslb.com/bfs/wbi/4932caff0ff746eab6f01bf08b70ac45.png"}}}
+
+
+def make_api(handler) -> AsyncBilibiliAPI:
+    limiter = RateLimiter({family: (0.0, 1) for family in ("search", "nav", "default")}, jitter=0)
+    return AsyncBilibiliAPI(cookies={}, rate_limiter=limiter, cache=ResponseCache(), wbi_signer=WbiSigner(),
+                            transport=httpx.MockTransport(handler))
+
+
+def make_handler(seen: list, nav_delay: float = 0.0):
+    async def handler(request):
+        seen.append((request.method, request.url.host, request.url.path))
+        if request.method == "HEAD":
+            return httpx.Response(200)
+        if request.url.path.endswith("/nav"):
+            await asyncio.sleep(nav_delay)
+            return httpx.Response(200, json=NAV)
+        return httpx.Response(200, json={"code": 0, "data": {"result": [{"mid": 1, "uname": "用户"}]}})
+    return handler
+
+
+def test_warm_up_prepares_client():
+    """测试预热后连接和WBI密钥就绪，首个签名请求不再请求导航接口"""
+    print("🔥 测试启动预热")
+    print("=" * 50)
+    
+    seen = []
+    api = make_api(make_handler(seen))
+    
+    async def run():
+        try:
+            status = dict(await main.warm_up(api))
+            warm_requests = list(seen)
+            await api.search_user_by_nickname("测试")
+            return status, warm_requests
+        finally:
+            await api.aclose()
+    
+    status, warm_requests = asyncio.run(run())
+    print(f"   预热状态: {status}")
+    print(f"   预热请求: {warm_requests}")
+    assert status["state"] == "ready" and status["wbi_keys"]
+    assert all(status["hosts"].values()) and len(status["hosts"]) == len(main.WARMUP_HOSTS)
+    assert {("HEAD", "api.bilibili.com"), ("HEAD", "s.search.bilibili.com")} <= {(m, h) for m, h, _ in warm_requests}
+    assert sum(1 for _, _, path in seen if path.endswith("/nav")) == 1, "首个签名请求直接使用预热获取的密钥"
+    assert api.wbi.has_usable_keys()
+    print("✅ 连接和WBI密钥在首个调用前就绪")
+
+
+def test_warm_up_during_handshake():
+    """测试预热与stdio握手并发执行，服务器退出时取消未完成的预热"""
+    print("\n🤝 测试握手期间预热")
+    print("=" * 50)
+    
+    original_api, original_run = main.bili_api_async, main.mcp.run_stdio_async
+    
+    async def run(nav_delay, serve_seconds):
+        main.bili_api_async = make_api(make_handler([], nav_delay))
+        
+        async def fake_stdio():
+            await asyncio.sleep(serve_seconds)
+        
+        main.mcp.run_stdio_async = fake_stdio
+        try:
+            start = time.monotonic()
+            await main.serve_stdio()
+            return dict(main.warmup_status), time.monotonic() - start
+        finally:
+            await main.bili_api_async.aclose()
+    
+    try:
+        status, elapsed = asyncio.run(run(0.2, 0.5))
+        print(f"   握手0.5秒, 导航0.2秒: {status['state']}, 预热{status['duration']}秒, 总耗时{elapsed:.2f}秒")
+        assert status["state"] == "ready" and elapsed < 0.7, "预热在握手期间完成，不延长启动"
+        
+        status, elapsed = asyncio.run(run(5.0, 0.1))
+        print(f"   导航5秒, 服务器0.1秒后退出: {status['state']}, 总耗时{elapsed:.2f}秒")
+        assert status["state"] == "cancelled" and elapsed < 1.0, "服务器退出时不等待预热"
+    finally:
+        main.bili_api_async, main.mcp.run_stdio_async = original_api, original_run
+    print("✅ 预热在后台执行，不阻塞服务器")
+
+
+def test_warm_up_through_pools():
+    """测试配置cookie池和代理池时预热各账号经由代理的客户端，不直连API主机"""
+    print("\n🧦 测试经由代理预热")
+    print("=" * 50)
+    
+    tunnels = []
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_CONNECT(self):
+            tunnels.append((self.server.server_address[1], self.path))
+            self.send_response(502)
+            self.end_headers()
+        
+        def log_message(self, *args):
+            pass
+    
+    servers = [ThreadingHTTPServer(("127.0.0.1", 0), Handler) for _ in range(2)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    ports = {server.server_address[1] for server in servers}
+    profiles = [CookieProfile(f"账号{uid}", {"SESSDATA": f"sessdata_{uid}", "DedeUserID": str(uid)}) for uid in (1, 2)]
+    limiter = RateLimiter({family: (0.0, 1) for family in ("nav", "default")}, jitter=0)
+    api = AsyncBilibiliAPI(cookies={}, rate_limiter=limiter, cache=ResponseCache(), wbi_signer=WbiSigner(),
+                           cookie_pool=CookiePool(profiles),
+                           proxy_pool=ProxyPool([f"http://127.0.0.1:{port}" for port in sorted(ports)]))
+    api.max_retries = 0
+    
+    async def run():
+        try:
+            status = dict(await main.warm_up(api))
+            return status, set(api._clients)
+        finally:
+            await api.aclose()
+    
+    try:
+        status, client_keys = asyncio.run(run())
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+    print(f"   客户端: {sorted((name, proxy.name) for name, proxy in client_keys if proxy is not None)}")
+    print(f"   代理收到的隧道请求: {sorted(tunnels)}")
+    assert (None, None) not in client_keys, "不预热直连的匿名客户端"
+    assert {key[0] for key in client_keys} == {"账号1", "账号2"}
+    for port in ports:
+        targets = {path for tunnel_port, path in tunnels if tunnel_port == port}
+        assert {"api.bilibili.com:443", "s.search.bilibili.com:443"} <= targets, "每个代理都预热了各API主机"
+    assert status["state"] == "ready"
+    print("✅ 预热经由代理池和cookie池的客户端")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试启动预热...")
+    
+    test_warm_up_prepares_client()
+    test_warm_up_during_handshake()
+    test_warm_up_through_pools()
+    
+    print("\n" + "=" * 60)
+    print("🎉 启动预热测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
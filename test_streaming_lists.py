@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+测试列表接口的流式解析
+验证分块解析、取够limit项后停止读取、失败回退，以及大响应下的峰值内存和首条结果耗时
+"""
+
+import asyncio
+import json
+import sys
+import os
+import time
+import tracemalloc
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+import main
+from main import AsyncBilibiliAPI, RateLimiter, ResponseCache, StreamingListExtractor
+
+
+def popular_body(count: int = 50, prefix: str = "") -> bytes:
+    videos = [{"bvid": f"BV1stream{i:04d}", "title": f"热门视频{i}", "desc": "简介" * 100,
+               "owner": {"mid": i, "name": f"UP主{i}"}, "stat": {"view": 10000 + i, "like": i}}
+              for i in range(count)]
+    doc = {"code": 0, "message": "0", "ttl": 1, "data": {"list": videos, "no_more": False}}
+    return (prefix + json.dumps(doc, ensure_ascii=False)).encode("utf-8")
+
+
+class ChunkedServer:
+    """按小块发送响应体，记录实际被读取的块数"""
+    
+    def __init__(self, body: bytes, chunk_size: int = 1024, fail_first: bool = False):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.fail_first = fail_first
+        self.requests = 0
+        self.chunks_sent = 0
+    
+    async def chunks(self):
+        for start in range(0, len(self.body), self.chunk_size):
+            self.chunks_sent += 1
+            yield self.body[start:start + self.chunk_size]
+    
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.fail_first and self.requests == 1:
+            return httpx.Response(200, headers={"content-type": "text/html"}, content=b"<html>busy</html>")
+        return httpx.Response(200, headers={"content-type": "application/json"}, content=self.chunks())
+    
+    @property
+    def total_chunks(self) -> int:
+        return -(-len(self.body) // self.chunk_size)
+
+
+def make_api(server: ChunkedServer) -> AsyncBilibiliAPI:
+    """创建不限速的测试实例"""
+    limiter = RateLimiter({"popular": (0.0, 1), "reply": (0.0, 1)}, jitter=0)
+    return AsyncBilibiliAPI(cookies={}, rate_limiter=limiter, cache=ResponseCache(),
+                            transport=httpx.MockTransport(server.handler))
+
+
+def test_extractor_chunks():
+    """测试任意分块下的解析结果一致"""
+    print("🧩 测试分块解析")
+    print("=" * 50)
+    
+    body = popular_body(20, prefix="!")
+    for chunk_size in (1, 5, 64, 4096, len(body)):
+        extractor = StreamingListExtractor(("data", "list"), 3)
+        for start in range(0, len(body), chunk_size):
+            if extractor.feed(body[start:start + chunk_size]):
+                break
+        result = extractor.close()
+        assert result["code"] == 0 and result["ttl"] == 1
+        assert [v["bvid"] for v in result["data"]["list"]] == ["BV1stream0000", "BV1stream0001", "BV1stream0002"]
+        assert extractor.truncated
+    
+    # 列表不足limit项时完整读取
+    extractor = StreamingListExtractor(("data", "list"), 50)
+    extractor.feed(popular_body(20))
+    assert len(extractor.close()["data"]["list"]) == 20 and not extractor.truncated
+    
+    # 没有目标列表的错误响应原样返回
+    extractor = StreamingListExtractor(("data", "list"), 5)
+    extractor.feed(json.dumps({"code": -352, "message": "风控校验失败"}).encode("utf-8"))
+    assert extractor.close() == {"code": -352, "message": "风控校验失败"}
+    
+    for bad in (b"<html>403 Forbidden</html>", b'{"code": 0, "data": {"list": [1, 2'):
+        extractor = StreamingListExtractor(("data", "list"), 5)
+        try:
+            extractor.feed(bad)
+            extractor.close()
+            assert False, "非JSON或不完整的响应应抛出ValueError"
+        except ValueError:
+            pass
+    print("✅ 分块解析结果一致，异常响应会被识别")
+
+
+def test_stops_reading_early():
+    """测试取够limit项后不再读取后续数据"""
+    print("\n✂️ 测试提前停止")
+    print("=" * 50)
+    
+    server = ChunkedServer(popular_body(50), chunk_size=1024)
+    api = make_api(server)
+    
+    async def run():
+        try:
+            first = await api.get_trending_videos(limit=3)
+            second = await api.get_trending_videos(limit=3)
+            return first, second
+        finally:
+            await api.aclose()
+    
+    first, second = asyncio.run(run())
+    assert len(first["data"]["list"]) == 3
+    print(f"   读取 {server.chunks_sent}/{server.total_chunks} 块")
+    assert server.chunks_sent < server.total_chunks / 4, "应在列表读完前停止"
+    assert second == first and server.requests == 1, "截断结果应被缓存"
+    print("✅ 取够数据后停止读取，结果已缓存")
+
+
+def test_fallback_and_tool():
+    """测试流式解析失败时回退到普通请求，工具输出按limit截断"""
+    print("\n↩️ 测试回退和工具输出")
+    print("=" * 50)
+    
+    server = ChunkedServer(popular_body(50), fail_first=True)
+    original = main.bili_api_async
+    main.bili_api_async = make_api(server)
+    try:
+        output = json.loads(main.get_trending_videos(limit=4, output_format="compact"))
+    finally:
+        main.bili_api_async = original
+    
+    assert server.requests == 2, "流式解析失败后应回退到普通请求"
+    assert output["data"]["count"] == 4
+    assert "total_available" not in output["data"], "流式解析只读取前limit项，列表总长度未知"
+    assert output["data"]["list"][0]["basic_info"]["bvid"] == "BV1stream0000"
+    print("✅ 回退正常，工具输出正确")
+
+
+def test_memory_and_first_result():
+    """对比完整解析和流式解析的峰值内存与首条结果耗时"""
+    print("\n📉 测试峰值内存和首条结果耗时")
+    print("=" * 50)
+    
+    body = popular_body(2000)
+    chunks = [body[i:i + main.STREAM_CHUNK_SIZE] for i in range(0, len(body), main.STREAM_CHUNK_SIZE)]
+    print(f"   响应大小: {len(body) / 1024:.0f}KB, {len(chunks)}块")
+    
+    def full_parse():
+        buffered = b"".join(chunks)
+        return main.json_codec.loads(buffered)["data"]["list"][:10]
+    
+    def stream_parse():
+        extractor = StreamingListExtractor(("data", "list"), 10)
+        for chunk in chunks:
+            if extractor.feed(chunk):
+                break
+        return extractor.close()["data"]["list"]
+    
+    def measure(parse):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = parse()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, peak, elapsed
+    
+    full, full_peak, full_time = measure(full_parse)
+    streamed, stream_peak, stream_time = measure(stream_parse)
+    assert streamed == full
+    print(f"   完整解析: 峰值{full_peak / 1024:.0f}KB, {full_time * 1000:.2f}ms")
+    print(f"   流式解析: 峰值{stream_peak / 1024:.0f}KB, {stream_time * 1000:.2f}ms")
+    assert stream_peak < full_peak / 5, "流式解析的峰值内存应明显更低"
+    print("✅ 流式解析降低了峰值内存")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试列表流式解析...")
+    
+    test_extractor_chunks()
+    test_stops_reading_early()
+    test_fallback_and_tool()
+    test_memory_and_first_result()
+    
+    print("\n" + "=" * 60)
+    print("🎉 列表流式解析测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
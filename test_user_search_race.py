@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+测试用户搜索的端点竞速
+验证竞速模式并发请求WBI搜索端点、采用最先返回的有效结果并取消其余请求，以及都无效时回退到备用端点
+"""
+
+import asyncio
+import sys
+import os
+import threading
+import time
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+from main import AsyncBilibiliAPI, BilibiliAPI, RateLimiter, ResponseCache, EndpointRouter, RATE_LIMIT_PROFILES
+
+USERS = [{"mid": 1000 + i, "uname": f"用户{i}", "fans": 100 - i} for i in range(3)]
+SLOW_SECONDS = 2.0
+
+
+def make_limiter() -> RateLimiter:
+    return RateLimiter({family: (0.0, 1) for family in ("search", "nav", "default")}, jitter=0)
+
+
+def make_api(handler) -> AsyncBilibiliAPI:
+    return AsyncBilibiliAPI(cookies={}, rate_limiter=make_limiter(), cache=ResponseCache(),
+                            router=EndpointRouter(), transport=httpx.MockTransport(handler))
+
+
+def make_handler(calls: dict, slow_path: str, state: dict):
+    """slow_path端点响应缓慢且无结果，其余搜索端点立即返回用户"""
+    async def handler(request):
+        path = request.url.path
+        if path.endswith("/nav"):
+            return httpx.Response(200, json={"code": -101, "message": "账号未登录"})
+        calls[path] = calls.get(path, 0) + 1
+        if path.endswith(slow_path):
+            try:
+                await asyncio.sleep(SLOW_SECONDS)
+            except asyncio.CancelledError:
+                state["cancelled"] = True
+                raise
+            return httpx.Response(200, json={"code": 0, "data": {"result": []}})
+        return httpx.Response(200, json={"code": 0, "data": {"result": USERS}})
+    return handler
+
+
+def test_race_beats_sequential():
+    """测试竞速模式取最先返回的结果，并取消慢请求"""
+    print("🏁 测试搜索端点竞速")
+    print("=" * 50)
+    
+    async def run(race: bool):
+        calls, state = {}, {}
+        api = make_api(make_handler(calls, "/wbi/search/type", state))
+        try:
+            start = time.monotonic()
+            result = await api.search_user_by_nickname("测试", race=race)
+            return result, time.monotonic() - start, calls, state
+        finally:
+            await api.aclose()
+    
+    result, raced, calls, state = asyncio.run(run(True))
+    print(f"   竞速: 耗时{raced:.2f}秒, 来源: {result['data']['source']}, 请求: {calls}")
+    assert result["code"] == 0 and result["data"]["numResults"] == 3
+    assert result["data"]["source"] == "WBI综合搜索API"
+    assert state.get("cancelled"), "取得结果后应取消仍在进行的请求"
+    assert "/x/web-interface/search/type" not in calls, "竞速成功时不请求备用端点"
+    
+    result, sequential, calls, _ = asyncio.run(run(False))
+    print(f"   顺序: 耗时{sequential:.2f}秒, 来源: {result['data']['source']}")
+    assert result["data"]["numResults"] == 3
+    assert raced < 0.5 < SLOW_SECONDS < sequential, "竞速应避免等待慢端点和端点间间隔"
+    print("✅ 竞速模式采用最先返回的有效结果")
+
+
+def test_race_falls_back():
+    """测试WBI端点都无效时回退到备用端点"""
+    print("\n↩️ 测试竞速失败回退")
+    print("=" * 50)
+    
+    calls = {}
+    
+    async def handler(request):
+        path = request.url.path
+        if path.endswith("/nav"):
+            return httpx.Response(200, json={"code": -101, "message": "账号未登录"})
+        calls[path] = calls.get(path, 0) + 1
+        if "/wbi/" in path:
+            return httpx.Response(200, json={"code": 0, "data": {"result": []}})
+        return httpx.Response(200, json={"code": 0, "data": {"result": USERS[:1]}})
+    
+    async def run():
+        api = make_api(handler)
+        try:
+            return await api.search_user_by_nickname("测试", race=True), api.router.describe()
+        finally:
+            await api.aclose()
+    
+    result, breakers = asyncio.run(run())
+    print(f"   来源: {result['data']['source']}, 请求: {calls}")
+    assert result["data"]["source"] == "用户搜索API（备用）"
+    assert calls["/x/web-interface/wbi/search/type"] == 1 and calls["/x/web-interface/wbi/search/all/v2"] == 1
+    assert breakers["user_search/用户搜索API（备用）"]["last_good"]
+    print("✅ 竞速无结果时依次尝试备用端点")
+
+
+def test_sync_race():
+    """测试同步版本的竞速模式"""
+    print("\n🧵 测试同步竞速")
+    print("=" * 50)
+    
+    api = BilibiliAPI(cookies={}, rate_limiter=make_limiter(), cache=ResponseCache(), router=EndpointRouter())
+    threading_event = threading.Event()
+    
+    def fake_request(url, params=None, headers=None, **kwargs):
+        if url.endswith("/wbi/search/type"):
+            threading_event.wait(SLOW_SECONDS)
+            return {"code": 0, "data": {"result": []}}
+        return {"code": 0, "data": {"result": USERS}}
+    
+    api._make_request = fake_request
+    api._update_wbi_keys = lambda: False
+    start = time.monotonic()
+    result = api.search_user_by_nickname("测试", race=True)
+    elapsed = time.monotonic() - start
+    threading_event.set()
+    print(f"   耗时{elapsed:.2f}秒, 来源: {result['data']['source']}")
+    assert result["data"]["source"] == "WBI综合搜索API"
+    assert elapsed < 0.5, "不等待慢端点返回"
+    print("✅ 同步竞速采用最先返回的结果")
+
+
+def test_race_with_real_profiles():
+    """测试按真实限速配置竞速：两个WBI端点同时发出，只消耗一个search令牌，回退端点照常限速"""
+    print("\n⏱️ 测试真实限速配置下的竞速")
+    print("=" * 50)
+    
+    sent = {}
+    
+    async def handler(request):
+        path = request.url.path
+        if path.endswith("/nav"):
+            return httpx.Response(200, json={"code": -101, "message": "账号未登录"})
+        sent[path] = time.monotonic()
+        if path.endswith("/wbi/search/type"):
+            return httpx.Response(200, json={"code": 0, "data": {"result": []}})
+        return httpx.Response(200, json={"code": 0, "data": {"result": USERS}})
+    
+    limiter = RateLimiter(jitter=0, adaptive=False)
+    assert limiter.profiles["search"] == RATE_LIMIT_PROFILES["search"]
+    
+    async def run():
+        api = AsyncBilibiliAPI(cookies={}, rate_limiter=limiter, cache=ResponseCache(),
+                               router=EndpointRouter(), transport=httpx.MockTransport(handler))
+        api._update_wbi_keys = lambda: asyncio.sleep(0, False)
+        try:
+            start = time.monotonic()
+            result = await api.search_user_by_nickname("测试", race=True)
+            return result, start, time.monotonic() - start
+        finally:
+            await api.aclose()
+    
+    result, start, elapsed = asyncio.run(run())
+    gap = abs(sent["/x/web-interface/wbi/search/type"] - sent["/x/web-interface/wbi/search/all/v2"])
+    tokens = limiter.bucket("search").available()
+    print(f"   耗时{elapsed:.2f}秒, 两个竞速请求间隔{gap:.3f}秒, search剩余令牌{tokens:.2f}")
+    assert result["data"]["source"] == "WBI综合搜索API"
+    assert gap < 0.5 and elapsed < 1.0, "竞速请求不应相隔一个search限速间隔"
+    assert -0.1 < tokens < 0.5, "一轮竞速只消耗一个search令牌"
+    
+    wait = limiter.reserve("https://api.bilibili.com/x/web-interface/wbi/search/type")
+    assert wait > 3.0, "竞速之外的请求照常限速"
+    
+    api = BilibiliAPI(cookies={}, rate_limiter=RateLimiter(jitter=0, adaptive=False), cache=ResponseCache(),
+                      router=EndpointRouter())
+    waits = []
+    api._make_request = lambda url, **kwargs: waits.append(api._pacing_delay(url)) or {"code": 0, "data": {"result": []}}
+    api._update_wbi_keys = lambda: False
+    api._race_user_search(api._split_race_endpoints(api._user_search_endpoints("测试"))[0])
+    print(f"   同步竞速各请求等待: {[round(wait, 2) for wait in waits]}")
+    assert len(waits) == 2 and max(waits) < 0.5
+    print("✅ 竞速请求同时发出，只计一次search限速")
+
+
+def main_test():
+    """主测试函数"""
+    print("🚀 开始测试用户搜索竞速...")
+    
+    test_race_beats_sequential()
+    test_race_falls_back()
+    test_sync_race()
+    test_race_with_real_profiles()
+    
+    print("\n" + "=" * 60)
+    print("🎉 用户搜索竞速测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main_test()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+测试WBI签名器
+验证混合密钥预计算、临近过期时后台刷新、刷新失败时继续使用旧密钥，以及密钥持久化
+"""
+
+import asyncio
+import hashlib
+import sys
+import os
+import tempfile
+import time
+import urllib.parse
+
+import httpx
+
+sys.path.append(os.path.dirname(__file__))
+
+from main import AsyncBilibiliAPI, RateLimiter, SQLiteCacheStore, WbiSigner, MIXIN_KEY_ENC_TAB
+
+IMG_KEY = "7cd084941338484aae1ad9425b84077c"
+SUB_KEY = "4932caff0ff746eab6f01bf08b70ac45"
+NEW_IMG_KEY = "0123456789abcdef0123456789abcdef"
+NEW_SUB_KEY = "fedcba9876543210fedcba9876543210"
+
+
+def reference_sign(params, img_key, sub_key):
+    """参考实现：每次调用都重新计算混合密钥"""
+    raw = img_key + sub_key
+    mixin_key = "".join(raw[i] for i in MIXIN_KEY_ENC_TAB if i < len(raw))[:32]
+    query = urllib.parse.urlencode(sorted(params.items()))
+    return hashlib.md5((query + mixin_key).encode("utf-8")).hexdigest()
+
+
+def nav_response(img_key, sub_key):
+    """构造导航接口返回"""
+    return {"code": 0, "data": {"wbi_img": {
+        "img_url": f"https://i0.hdslb.com/bfs/wbi/{img_key}.png",
+        "sub_url": f"https://i0.hdslb.com/bfs/wbi/{sub_key}.png",
+    }}}
+
+
+def make_api(handler, signer):
+    """创建使用模拟导航接口的异步实例"""
+    limiter = RateLimiter({"nav": (0.0, 1)}, jitter=0)
+    return AsyncBilibiliAPI(cookies={}, rate_limiter=limiter, wbi_signer=signer,
+                            transport=httpx.MockTransport(handler))
+
+
+def test_precomputed_signature_matches_reference():
+    """测试预计算混合密钥的签名与参考实现一致"""
+    print("🔐 测试签名结果")
+    print("=" * 50)
+    
+    signer = WbiSigner()
+    signer.set_keys(IMG_KEY, SUB_KEY)
+    signed = signer.sign({"mid": 2, "keyword": "测试"})
+    
+    unsigned = {k: v for k, v in signed.items() if k != "w_rid"}
+    expected = reference_sign(unsigned, IMG_KEY, SUB_KEY)
+    print(f"📊 w_rid={signed['w_rid']}")
+    assert signed["w_rid"] == expected
+    assert len(signer.mixin_key) == 32
+    print("✅ 签名与参考实现一致")
+
+
+def test_stale_keys_refresh_in_background():
+    """测试临近过期时先用旧密钥签名，后台刷新后切换新密钥"""
+    print("\n🔄 测试后台刷新")
+    print("=" * 50)
+    
+    calls = []
+    
+    async def handler(request):
+        calls.append(time.perf_counter())
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json=nav_response(NEW_IMG_KEY, NEW_SUB_KEY))
+    
+    async def run():
+        signer = WbiSigner(ttl=3600, refresh_ahead=600)
+        # 密钥已获取55分钟，进入提前刷新窗口
+        signer.set_keys(IMG_KEY, SUB_KEY, fetched_at=time.time() - 55 * 60)
+        api = make_api(handler, signer)
+        
+        start = time.perf_counter()
+        signed = await asyncio.gather(*(api._generate_wbi_signature({"mid": i}) for i in range(5)))
+        elapsed = time.perf_counter() - start
+        old_key = signer.img_key
+        
+        await api._wbi_refresh_task
+        await api.aclose()
+        return signed, elapsed, old_key, signer
+    
+    signed, elapsed, old_key, signer = asyncio.run(run())
+    print(f"📊 签名耗时: {elapsed * 1000:.1f}ms, 导航请求次数: {len(calls)}")
+    
+    assert all("w_rid" in s for s in signed)
+    assert elapsed < 0.1, "签名不应等待导航请求"
+    assert old_key == IMG_KEY
+    assert len(calls) == 1, "并发签名只应触发一次刷新"
+    assert signer.img_key == NEW_IMG_KEY and signer.is_fresh()
+    print("✅ 旧密钥立即可用，后台刷新只触发一次")
+
+
+def test_refresh_failure_keeps_old_keys():
+    """测试刷新失败时继续使用旧密钥，并在重试间隔内不再请求"""
+    print("\n🛟 测试刷新失败")
+    print("=" * 50)
+    
+    calls = []
+    
+    async def handler(request):
+        calls.append(request.url.path)
+        return httpx.Response(200, json={"code": -412, "message": "请求被拦截"})
+    
+    async def run():
+        signer = WbiSigner(ttl=3600, refresh_ahead=600, retry_interval=60)
+        # 密钥已过期10分钟，但仍在可用期限内
+        signer.set_keys(IMG_KEY, SUB_KEY, fetched_at=time.time() - 70 * 60)
+        api = make_api(handler, signer)
+        
+        first = await api._generate_wbi_signature({"mid": 1})
+        await api._wbi_refresh_task
+        second = await api._generate_wbi_signature({"mid": 2})
+        await api.aclose()
+        return first, second, signer
+    
+    first, second, signer = asyncio.run(run())
+    print(f"📊 导航请求次数: {len(calls)}, 失败次数: {signer.refresh_failures}")
+    
+    assert "w_rid" in first and "w_rid" in second
+    assert signer.img_key == IMG_KEY
+    assert signer.refresh_failures == 1
+    assert len(calls) == 1, "重试间隔内不应再次请求"
+    print("✅ 刷新失败后继续使用旧密钥签名")
+
+
+def test_cancelled_refresh_releases_flag():
+    """测试后台刷新随事件循环关闭被取消后，之后仍能再次刷新"""
+    print("\n🧹 测试被取消的后台刷新")
+    print("=" * 50)
+    
+    async def handler(request):
+        await asyncio.sleep(5)
+        return httpx.Response(200, json=nav_response(NEW_IMG_KEY, NEW_SUB_KEY))
+    
+    signer = WbiSigner(ttl=3600, refresh_ahead=600, retry_interval=0)
+    signer.set_keys(IMG_KEY, SUB_KEY, fetched_at=time.time() - 55 * 60)
+    api = make_api(handler, signer)
+    
+    async def started():
+        # 刷新任务已开始等待导航接口，工具调用结束时事件循环关闭并取消它
+        await api._generate_wbi_signature({"mid": 1})
+        await asyncio.sleep(0.05)
+    
+    start = time.perf_counter()
+    asyncio.run(started())
+    print(f"   已开始的任务被取消: 耗时{time.perf_counter() - start:.2f}秒, 失败次数{signer.refresh_failures}")
+    assert signer.refresh_failures == 1 and signer.begin_refresh(), "finally中应结束刷新状态"
+    signer.end_refresh(None)
+    
+    async def unstarted():
+        # 刷新任务还没开始执行就被取消（协程体不会运行，finally也不会执行），超过refresh_timeout后视为已放弃
+        await api._update_wbi_keys()
+        api._wbi_refresh_task.cancel()
+    
+    signer.refresh_timeout = 0.1
+    asyncio.run(unstarted())
+    assert not signer.begin_refresh(), "刷新中不重复发起"
+    time.sleep(0.15)
+    assert signer.begin_refresh(), "放弃的刷新超时后可以重新发起"
+    print("✅ 被取消的刷新不会让密钥永远无法刷新")
+
+
+def test_keys_persist_across_restart():
+    """测试密钥在重启后从持久化存储加载"""
+    print("\n💾 测试密钥持久化")
+    print("=" * 50)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite3")
+        
+        store = SQLiteCacheStore(path)
+        WbiSigner(store=store).set_keys(IMG_KEY, SUB_KEY)
+        store.close()
+        
+        store = SQLiteCacheStore(path)
+        signer = WbiSigner(store=store)
+        store.prune()
+        reloaded = WbiSigner(store=store)
+        store.close()
+    
+    print(f"📊 重启后 img_key={signer.img_key[:8]}..., 有效: {signer.is_fresh()}")
+    assert signer.img_key == IMG_KEY and signer.sub_key == SUB_KEY
+    assert signer.is_fresh()
+    assert reloaded.mixin_key == signer.mixin_key, "缓存清理不应删除密钥"
+    print("✅ 重启后无需请求导航接口即可签名")
+
+
+def main():
+    """主测试函数"""
+    print("🚀 开始测试WBI签名器...")
+    
+    test_precomputed_signature_matches_reference()
+    test_stale_keys_refresh_in_background()
+    test_refresh_failure_keeps_old_keys()
+    test_cancelled_refresh_releases_flag()
+    test_keys_persist_across_restart()
+    
+    print("\n" + "=" * 60)
+    print("🎉 WBI签名器测试完成！")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()